@@ -0,0 +1,235 @@
+import atexit
+import os
+import threading
+import uuid
+from datetime import date, datetime
+from question_bank import get_question_bank
+from scoring import empty_match, is_non_answer, matchers_for
+
+DEFAULT_ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics")
+
+# Column order of the answer table; job_type and interview_date are the partition keys
+ANSWER_COLUMNS = (
+    "session_id", "job_type", "interview_date", "completed_at", "question_index", "question",
+    "answer", "difficulty", "score", "word_count", "non_answer",
+    "high_value_hits", "medium_value_hits", "basic_value_hits", "matched_keywords",
+)
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("session_id", pa.string()),
+        ("job_type", pa.string()),
+        ("interview_date", pa.date32()),
+        ("completed_at", pa.timestamp("ms")),
+        ("question_index", pa.int16()),
+        ("question", pa.string()),
+        ("answer", pa.string()),
+        ("difficulty", pa.string()),
+        ("score", pa.float64()),
+        ("word_count", pa.int32()),
+        ("non_answer", pa.bool_()),
+        ("high_value_hits", pa.int32()),
+        ("medium_value_hits", pa.int32()),
+        ("basic_value_hits", pa.int32()),
+        ("matched_keywords", pa.list_(pa.string())),
+    ])
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def answer_rows(interview_data, session_id=None, question_bank=None):
+    """One row per answer of a finished interview, with its keyword hits"""
+    job_type = interview_data["job_type"]
+    completed_at = _as_datetime(interview_data["end_time"]) or datetime.now()
+    matchers = matchers_for(question_bank or get_question_bank())
+    session_id = session_id or uuid.uuid4().hex
+
+    rows = []
+    for index, (question, answer, difficulty, score) in enumerate(zip(
+        interview_data["questions"],
+        interview_data["answers"],
+        interview_data["difficulty_levels"],
+        interview_data["scores"]
+    )):
+        non_answer = is_non_answer(answer)
+        matcher = matchers.get((job_type, difficulty))
+        match = empty_match() if non_answer or matcher is None else matcher.match(answer)
+        rows.append({
+            "session_id": session_id,
+            "job_type": job_type,
+            "interview_date": completed_at.date(),
+            "completed_at": completed_at,
+            "question_index": index,
+            "question": question,
+            "answer": answer,
+            "difficulty": difficulty,
+            "score": float(score),
+            "word_count": len(answer.split()) if answer else 0,
+            "non_answer": non_answer,
+            "high_value_hits": match["counts"]["high_value"],
+            "medium_value_hits": match["counts"]["medium_value"],
+            "basic_value_hits": match["counts"]["basic_value"],
+            "matched_keywords": [keyword for keywords in match["matched"].values() for keyword in keywords],
+        })
+    return rows
+
+class AnalyticsStore:
+    """Parquet dataset of answered questions, partitioned by job_type and interview_date.
+
+    Interviews are buffered and written as one file per partition once flush_rows
+    answers have accumulated or flush_seconds after the first of them arrived, so the
+    dataset does not fill up with tiny files. Queries prune partitions and aggregate with Arrow compute kernels.
+    pyarrow is imported on first use.
+    """
+    def __init__(self, root=DEFAULT_ANALYTICS_DIR, flush_rows=5000, flush_seconds=60.0):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def append_interview(self, interview_data, session_id=None):
+        """Buffer a completed interview; it is written on a background thread once the
+        buffer is full or flush_seconds have passed, whichever comes first"""
+        rows = answer_rows(interview_data, session_id)
+        with self._lock:
+            if not self._buffer:
+                # Time-based flushes don't wait for another interview to arrive
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.name = "analytics-flush-timer"
+                self._timer.daemon = True
+                self._timer.start()
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            threading.Thread(target=self.flush, name="analytics-flush", daemon=True).start()
+
+    def flush(self):
+        """Write buffered answers to the dataset; returns the number of rows written"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not rows:
+            return 0
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pylist(rows, schema=_schema())
+        with self._write_lock:
+            pq.write_to_dataset(
+                table,
+                self.root,
+                partition_cols=["job_type", "interview_date"],
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            )
+        return len(rows)
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(
+            pa.schema([("job_type", pa.string()), ("interview_date", pa.date32())]),
+            flavor="hive"
+        )
+        return ds.dataset(self.root, format="parquet", partitioning=partitioning)
+
+    def scan(self, columns=None, job_type=None, start_date=None, end_date=None, include_non_answers=True):
+        """Read answers as a pyarrow Table, pruning partitions by job type and date range"""
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.root):
+            return _schema().empty_table().select(list(columns or ANSWER_COLUMNS))
+
+        conditions = []
+        if job_type is not None:
+            conditions.append(ds.field("job_type") == job_type)
+        if start_date is not None:
+            conditions.append(ds.field("interview_date") >= _as_date(start_date))
+        if end_date is not None:
+            conditions.append(ds.field("interview_date") <= _as_date(end_date))
+        if not include_non_answers:
+            conditions.append(ds.field("non_answer") == False)
+
+        condition = None
+        for expression in conditions:
+            condition = expression if condition is None else condition & expression
+        return self._dataset().to_table(columns=list(columns) if columns else None, filter=condition)
+
+    def average_score_by(self, keys, **filters):
+        """Mean score and answer count per group, e.g. keys=["difficulty"] or ["job_type", "question"]"""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        table = self.scan(columns=keys + ["score"], **filters)
+        result = table.group_by(keys).aggregate([("score", "mean"), ("score", "count")])
+        result = result.select(keys + ["score_mean", "score_count"]).rename_columns(keys + ["average_score", "answers"])
+        return result.sort_by([(key, "ascending") for key in keys])
+
+    def score_by_question(self, **filters):
+        return self.average_score_by(["job_type", "difficulty", "question"], **filters)
+
+    def score_by_difficulty(self, **filters):
+        return self.average_score_by(["job_type", "difficulty"], **filters)
+
+    def keyword_effectiveness(self, **filters):
+        """For each matched keyword: how often it appears and the mean score of answers using it"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        table = self.scan(columns=["job_type", "matched_keywords", "score"], include_non_answers=False, **filters)
+        keywords = table["matched_keywords"].combine_chunks()
+        parents = pc.list_parent_indices(keywords)
+        exploded = pa.table({
+            "job_type": pc.take(table["job_type"], parents),
+            "keyword": pc.list_flatten(keywords),
+            "score": pc.take(table["score"], parents),
+        })
+        result = exploded.group_by(["job_type", "keyword"]).aggregate([("score", "mean"), ("score", "count")])
+        result = result.select(["job_type", "keyword", "score_mean", "score_count"])
+        result = result.rename_columns(["job_type", "keyword", "average_score", "answers"])
+        return result.sort_by([("answers", "descending")])
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_analytics_store():
+    """Process-wide analytics store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AnalyticsStore()
+    return _store
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregate stored interview answers")
+    parser.add_argument("report", choices=["by-question", "by-difficulty", "keywords"])
+    parser.add_argument("--root", default=DEFAULT_ANALYTICS_DIR)
+    parser.add_argument("--job-type")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.root)
+    filters = {"job_type": args.job_type, "start_date": args.since, "end_date": args.until}
+    queries = {
+        "by-question": store.score_by_question,
+        "by-difficulty": store.score_by_difficulty,
+        "keywords": store.keyword_effectiveness,
+    }
+    print(queries[args.report](**filters).to_pandas().to_string(index=False))
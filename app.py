@@ -1,350 +1,100 @@
 import streamlit as st
 import json
 from datetime import datetime
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
 import threading
 import time
-import io
 import re
-from enhanced_speech_handler import SpeechHandler
+from concurrent.futures import ThreadPoolExecutor
+from interview_core import InterviewCore
 
-class InterviewAgent:
-    def __init__(self):
-        self.questions_db = {
-            "Plumber": {
-                "easy": [
-                    "What is the main purpose of a P-trap in plumbing?",
-                    "What tools do you commonly use for basic pipe repairs?",
-                    "How do you turn off the main water supply?",
-                    "What's the difference between hot and cold water pipes?",
-                    "What should you do if you find a small water leak?"
-                ],
-                "medium": [
-                    "How would you diagnose a running toilet problem?",
-                    "Explain the process of installing a new faucet.",
-                    "What causes low water pressure and how do you fix it?",
-                    "How do you properly join copper pipes?",
-                    "What are the signs of a failing water heater?"
-                ],
-                "hard": [
-                    "Explain the hydraulic principles behind water hammer and its solutions.",
-                    "How would you design a drainage system for a multi-story building?",
-                    "What are the code requirements for backflow prevention systems?",
-                    "How do you calculate pipe sizing for a commercial building?",
-                    "Explain the process of hydro jetting and when it's appropriate."
-                ]
-            },
-            "Electrician": {
-                "easy": [
-                    "What is the purpose of a circuit breaker?",
-                    "What's the difference between AC and DC current?",
-                    "What tools do you need for basic electrical work?",
-                    "What safety precautions should you take before working on electrical systems?",
-                    "What does grounding mean in electrical systems?"
-                ],
-                "medium": [
-                    "How do you wire a three-way switch?",
-                    "What causes electrical outlets to stop working?",
-                    "Explain how to install a ceiling fan with proper wiring.",
-                    "What are GFCI outlets and where are they required?",
-                    "How do you troubleshoot a circuit that keeps tripping?"
-                ],
-                "hard": [
-                    "Explain three-phase power systems and their applications.",
-                    "How do you design electrical load calculations for a building?",
-                    "What are the NEC requirements for electrical panel installations?",
-                    "How do you troubleshoot motor control circuits?",
-                    "Explain power factor correction and its importance."
-                ]
-            }
-        }
-        
-        # Scoring keywords for each job type
-        self.scoring_keywords = {
-            "Plumber": {
-                "easy": {
-                    "high_value": ["trap", "sewer", "gas", "prevent", "water", "drain", "pipe"],
-                    "medium_value": ["plumbing", "tools", "wrench", "valve", "supply", "leak", "repair"],
-                    "basic_value": ["turn", "off", "main", "hot", "cold", "fix", "check"]
-                },
-                "medium": {
-                    "high_value": ["diagnose", "flapper", "chain", "installation", "pressure", "copper", "solder", "temperature"],
-                    "medium_value": ["toilet", "faucet", "valve", "joint", "pipe", "water", "heater", "flow"],
-                    "basic_value": ["running", "install", "low", "join", "signs", "failing", "problem"]
-                },
-                "hard": {
-                    "high_value": ["hydraulic", "water hammer", "arrestor", "drainage", "code", "backflow", "prevention", "calculation", "hydro jetting"],
-                    "medium_value": ["principles", "design", "building", "requirements", "sizing", "commercial", "process"],
-                    "basic_value": ["explain", "solutions", "system", "appropriate", "when", "why"]
-                }
-            },
-            "Electrician": {
-                "easy": {
-                    "high_value": ["circuit breaker", "overload", "protection", "AC", "DC", "current", "alternating", "direct", "grounding", "safety"],
-                    "medium_value": ["electrical", "tools", "multimeter", "wire", "voltage", "safety", "precautions"],
-                    "basic_value": ["purpose", "difference", "work", "take", "mean", "systems"]
-                },
-                "medium": {
-                    "high_value": ["three-way switch", "traveler", "GFCI", "ground fault", "troubleshoot", "circuit", "tripping"],
-                    "medium_value": ["wire", "outlets", "ceiling fan", "installation", "electrical", "power"],
-                    "basic_value": ["causes", "install", "required", "working", "problem"]
-                },
-                "hard": {
-                    "high_value": ["three-phase", "power systems", "load calculations", "NEC", "motor control", "power factor", "correction"],
-                    "medium_value": ["design", "electrical", "building", "requirements", "panel", "installations", "circuits"],
-                    "basic_value": ["explain", "applications", "troubleshoot", "importance"]
-                }
-            }
-        }
-        
-        self.interview_data = {
-            "job_type": "",
-            "questions": [],
-            "answers": [],
-            "difficulty_levels": [],
-            "scores": [],
-            "start_time": None,
-            "end_time": None
-        }
-        
-        self.current_difficulty = "medium"
-        self.question_count = 0
-        self.max_questions = 5
-        
-        # Initialize enhanced speech handler
-        self.speech_handler = SpeechHandler()
-        
-    def calculate_answer_score(self, answer, difficulty):
-        """Calculate score for an answer based on keywords and quality"""
-        if not answer or answer.lower() in ["skipped", "timeout", "unclear", "no_speech_detected"]:
-            return 0
-        
-        answer_lower = answer.lower()
-        job_keywords = self.scoring_keywords.get(self.interview_data["job_type"], {}).get(difficulty, {})
-        
-        # Count keyword matches
-        high_value_matches = sum(1 for keyword in job_keywords.get("high_value", []) if keyword in answer_lower)
-        medium_value_matches = sum(1 for keyword in job_keywords.get("medium_value", []) if keyword in answer_lower)
-        basic_value_matches = sum(1 for keyword in job_keywords.get("basic_value", []) if keyword in answer_lower)
-        
-        # Calculate base score from keywords
-        keyword_score = (high_value_matches * 3) + (medium_value_matches * 2) + (basic_value_matches * 1)
-        
-        # Adjust score based on answer length and completeness
-        word_count = len(answer.split())
-        length_multiplier = min(1.0, word_count / 20)  # Optimal around 20 words
-        
-        # Calculate final score (0-10)
-        base_score = min(10, keyword_score * length_multiplier)
-        
-        # Bonus for comprehensive answers
-        if word_count > 30 and high_value_matches > 0:
-            base_score = min(10, base_score + 1)
-        
-        # Difficulty adjustment
-        difficulty_multipliers = {"easy": 0.8, "medium": 1.0, "hard": 1.2}
-        final_score = min(10, base_score * difficulty_multipliers.get(difficulty, 1.0))
-        
-        return round(final_score, 1)
-    
-    def evaluate_answer_quality(self, answer):
-        """Enhanced answer quality evaluation"""
-        if not answer or len(answer.strip()) < 10:
-            return "poor"
-        
-        score = self.calculate_answer_score(answer, self.current_difficulty)
-        
-        if score >= 7:
-            return "good"
-        elif score >= 4:
-            return "average"
-        else:
-            return "poor"
+@st.cache_resource
+def get_speech_handler():
+    """Process-wide speech handler, so sessions share one microphone, mixer and TTS engine"""
+    from enhanced_speech_handler import SpeechHandler
+    return SpeechHandler()
+
+@st.cache_resource
+def get_speech_executor():
+    """Process-wide worker pool that runs speech capture and recognition off the script thread"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="speech")
+
+def _preload_speech_models():
+    from asr_backends import preload_backends
+    from tts_engines import get_piper_worker, piper_available
     
-    def adjust_difficulty(self, answer_quality):
-        """Adjust difficulty based on answer quality"""
-        if answer_quality == "good" and self.current_difficulty != "hard":
-            if self.current_difficulty == "easy":
-                self.current_difficulty = "medium"
-            else:
-                self.current_difficulty = "hard"
-        elif answer_quality == "poor" and self.current_difficulty != "easy":
-            if self.current_difficulty == "hard":
-                self.current_difficulty = "medium"
-            else:
-                self.current_difficulty = "easy"
+    preload_backends()
+    if piper_available():
+        get_piper_worker()
+
+@st.cache_resource
+def preload_speech_models():
+    """Start loading offline recognition and Piper voice models once per process, off the script thread"""
+    return get_speech_executor().submit(_preload_speech_models)
+
+@st.cache_resource
+def get_session_store():
+    """Process-wide interview event log; SESSION_STORE_URL picks the backend, SQLite by default"""
+    from session_store import create_session_store
+    return create_session_store()
+
+class InterviewAgent(InterviewCore):
+    __slots__ = ()
     
-    def get_next_question(self):
-        """Get next question based on current difficulty"""
-        if self.question_count >= self.max_questions:
-            return None
-        
-        questions = self.questions_db[self.interview_data["job_type"]][self.current_difficulty]
-        question = questions[self.question_count % len(questions)]
-        return question
+    @property
+    def speech_handler(self):
+        """Shared enhanced speech handler, initialized the first time any session uses speech"""
+        return get_speech_handler()
     
     def speak_text_threaded(self, text):
-        """Convert text to speech with proper error handling"""
-        try:
-            # Reset TTS engine before speaking
-            self.speech_handler.reset_tts_engine()
-            
-            # Use synchronous speech for better reliability
-            self.speech_handler.speak_text(text)
-            
-        except Exception as e:
-            st.error(f"TTS Error: {str(e)}")
-            # Try reinitializing the speech handler
+        """Speak text on the background pool so the script thread never waits for audio"""
+        speech_handler = self.speech_handler
+        
+        def speak():
             try:
-                self.speech_handler = SpeechHandler()
-                self.speech_handler.speak_text(text)
-            except Exception as e2:
-                st.error(f"TTS Reinit Error: {str(e2)}")
+                speech_handler.speak_text(text)
+            except Exception as e:
+                print(f"TTS Error: {e}")
+        
+        return get_speech_executor().submit(speak)
     
-    def listen_for_speech(self, timeout=20):
+    def listen_for_speech(self, timeout=20, on_status=None):
         """Enhanced speech recognition with better pause handling"""
         return self.speech_handler.listen_for_speech_with_pauses(
             timeout=timeout, 
-            max_pause_duration=3.0
+            max_pause_duration=3.0,
+            on_status=on_status
         )
     
-    def calculate_overall_score(self):
-        """Calculate overall interview score"""
-        if not self.interview_data["scores"]:
-            return 0
-        
-        total_score = sum(self.interview_data["scores"])
-        max_possible = len(self.interview_data["scores"]) * 10
-        percentage = (total_score / max_possible) * 100 if max_possible > 0 else 0
-        
-        return {
-            "total_points": total_score,
-            "max_possible": max_possible,
-            "percentage": round(percentage, 1),
-            "grade": self.get_grade(percentage),
-            "average_per_question": round(total_score / len(self.interview_data["scores"]), 1)
-        }
-    
-    def get_grade(self, percentage):
-        """Convert percentage to letter grade"""
-        if percentage >= 90:
-            return "A+"
-        elif percentage >= 80:
-            return "A"
-        elif percentage >= 70:
-            return "B"
-        elif percentage >= 60:
-            return "C"
-        elif percentage >= 50:
-            return "D"
-        else:
-            return "F"
-    
-    def generate_pdf_report(self):
-        """Generate enhanced PDF report with scoring"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=20,
-            textColor=colors.darkblue,
-            spaceAfter=30,
-            alignment=1
-        )
-        story.append(Paragraph("Interview Assessment Report", title_style))
-        
-        # Calculate overall score
-        score_data = self.calculate_overall_score()
-        
-        # Interview details with scoring
-        details = [
-            ["Job Type:", self.interview_data["job_type"]],
-            ["Date:", datetime.now().strftime("%Y-%m-%d")],
-            ["Duration:", f"{(self.interview_data['end_time'] - self.interview_data['start_time']).seconds // 60} minutes"],
-            ["Questions Asked:", str(len(self.interview_data["questions"]))],
-            ["Overall Score:", f"{score_data['total_points']}/{score_data['max_possible']} ({score_data['percentage']}%)"],
-            ["Grade:", score_data['grade']],
-            ["Average per Question:", f"{score_data['average_per_question']}/10"]
-        ]
-        
-        detail_table = Table(details, colWidths=[2*inch, 4*inch])
-        detail_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
-            ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
-            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 12),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 12),
-            ('GRID', (0,0), (-1,-1), 1, colors.black)
-        ]))
-        
-        story.append(detail_table)
-        story.append(Spacer(1, 20))
-        
-        # Performance Analysis
-        story.append(Paragraph("Performance Analysis", styles['Heading2']))
-        performance_text = f"""
-        <b>Overall Performance:</b> {score_data['grade']} ({score_data['percentage']}%)<br/>
-        <b>Strengths:</b> {'Good technical knowledge' if score_data['percentage'] > 70 else 'Room for improvement in technical areas'}<br/>
-        <b>Areas for Improvement:</b> {'Continue building on strong foundation' if score_data['percentage'] > 70 else 'Focus on technical terminology and detailed explanations'}
+    def start_listening(self, timeout=20):
+        """Start speech capture on the background pool.
+
+        Returns a job whose status and partial transcript update live; its future
+        resolves to the final transcript. Setting its cancel event stops the capture.
         """
-        story.append(Paragraph(performance_text, styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        # Score breakdown table
-        score_breakdown = [["Question", "Difficulty", "Score", "Answer Quality"]]
-        for i, (score, difficulty) in enumerate(zip(self.interview_data["scores"], self.interview_data["difficulty_levels"])):
-            quality = "Excellent" if score >= 8 else "Good" if score >= 6 else "Average" if score >= 4 else "Poor"
-            score_breakdown.append([f"Q{i+1}", difficulty.title(), f"{score}/10", quality])
-        
-        score_table = Table(score_breakdown, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch])
-        score_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.grey),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 10),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-            ('GRID', (0,0), (-1,-1), 1, colors.black)
-        ]))
-        
-        story.append(Paragraph("Score Breakdown", styles['Heading3']))
-        story.append(score_table)
-        story.append(Spacer(1, 20))
-        
-        # Questions and answers
-        story.append(Paragraph("Interview Questions & Answers", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        for i, (question, answer, difficulty, score) in enumerate(zip(
-            self.interview_data["questions"], 
-            self.interview_data["answers"],
-            self.interview_data["difficulty_levels"],
-            self.interview_data["scores"]
-        )):
-            # Question with score
-            story.append(Paragraph(f"<b>Question {i+1} (Difficulty: {difficulty.title()}) - Score: {score}/10</b>", styles['Normal']))
-            story.append(Paragraph(question, styles['Normal']))
-            story.append(Spacer(1, 6))
-            
-            # Answer
-            story.append(Paragraph("<b>Answer:</b>", styles['Normal']))
-            story.append(Paragraph(answer, styles['Normal']))
-            story.append(Spacer(1, 12))
-        
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+        job = {"status": "Listening... Speak clearly and take natural pauses.", "partial": "", "future": None,
+               "cancel": threading.Event()}
+        
+        def update_status(message):
+            job["status"] = message
+        
+        def stream():
+            # Don't let the question being read out end up in the answer
+            self.speech_handler.stop_speaking()
+            result = None
+            for update in self.speech_handler.stream_speech_with_pauses(
+                timeout=timeout,
+                max_pause_duration=3.0,
+                on_status=update_status,
+                cancel=job["cancel"]
+            ):
+                if update["final"]:
+                    result = update["text"]
+                else:
+                    job["partial"] = update["text"]
+            return result
+        
+        job["future"] = get_speech_executor().submit(stream)
+        return job
 
 def main():
     st.set_page_config(
@@ -356,9 +106,9 @@ def main():
     st.title("🤖 AI Interview Agent with Smart Scoring")
     st.markdown("An intelligent interviewing system with dynamic difficulty adjustment and comprehensive scoring")
     
-    # Initialize session state
+    # Initialize session state, resuming the interview named in the URL after a reconnect or restart
     if 'agent' not in st.session_state:
-        st.session_state.agent = InterviewAgent()
+        _restore_session()
     if 'interview_started' not in st.session_state:
         st.session_state.interview_started = False
     if 'interview_completed' not in st.session_state:
@@ -371,15 +121,18 @@ def main():
         st.session_state.is_listening = False
     if 'listening_status' not in st.session_state:
         st.session_state.listening_status = ""
+    if 'listening_job' not in st.session_state:
+        st.session_state.listening_job = None
     
     agent = st.session_state.agent
+    preload_speech_models()
     
     # Job Selection
     if not st.session_state.interview_started:
         st.header("Step 1: Select Job Type")
         job_type = st.selectbox(
             "Which job are you applying for?",
-            ["", "Plumber", "Electrician"],
+            [""] + agent.question_bank.trades(),
             help="Select the job type you want to be interviewed for"
         )
         
@@ -393,8 +146,14 @@ def main():
         if job_type and st.button("Start Interview", type="primary"):
             agent.interview_data["job_type"] = job_type
             agent.interview_data["start_time"] = datetime.now()
+            _record_event("started", {
+                "job_type": job_type,
+                "start_time": agent.interview_data["start_time"],
+                "max_questions": agent.max_questions
+            })
             st.session_state.interview_started = True
             st.session_state.current_question = agent.get_next_question()
+            _record_question(agent)
             st.rerun()
     
     # Interview Process
@@ -411,12 +170,11 @@ def main():
             
             # TTS Button with improved error handling
             if st.button("🔊 Listen to Question"):
-                with st.spinner("Speaking question..."):
-                    try:
-                        agent.speak_text_threaded(st.session_state.current_question)
-                        st.success("Question is being spoken! 🔊")
-                    except Exception as e:
-                        st.error(f"TTS Error: {e}")
+                try:
+                    agent.speak_text_threaded(st.session_state.current_question)
+                    st.success("Question is being spoken! 🔊")
+                except Exception as e:
+                    st.error(f"TTS Error: {e}")
             
             # Answer input methods
             st.subheader("Your Answer:")
@@ -428,21 +186,12 @@ def main():
                 st.write("**Option 1: Enhanced Speech Input**")
                 
                 # Speech to text button
-                if st.button("🎤 Start Speaking (Enhanced)", key="speech_button"):
+                if st.button("🎤 Start Speaking (Enhanced)", key="speech_button") and not st.session_state.is_listening:
                     st.session_state.is_listening = True
-                    st.session_state.listening_status = "Listening... Speak clearly and take natural pauses."
+                    st.session_state.listening_job = agent.start_listening(timeout=15)
                     
                 if st.session_state.is_listening:
-                    status_placeholder = st.empty()
-                    status_placeholder.info(st.session_state.listening_status)
-                    
-                    with st.spinner("🎤 Listening for up to 15 seconds... Speak now!"):
-                        speech_result = agent.listen_for_speech(timeout=15)
-                        st.session_state.speech_answer = speech_result
-                        st.session_state.is_listening = False
-                        st.session_state.listening_status = ""
-                        status_placeholder.empty()
-                        st.rerun()
+                    _poll_listening_job()
                 
                 # Display speech result
                 if st.session_state.speech_answer:
@@ -558,14 +307,15 @@ def main():
                 st.write(f"**Answer:** {answer}")
                 st.write("---")
         
-        # Generate PDF Report
+        # Generate PDF Report; rendering starts in the background as soon as results show
+        report_future = agent.submit_pdf_report()
         if st.button("📄 Generate PDF Report", type="primary"):
             with st.spinner("Generating comprehensive report..."):
-                pdf_buffer = agent.generate_pdf_report()
+                pdf_bytes = report_future.result()
                 
                 st.download_button(
                     label="📥 Download Interview Report with Scoring",
-                    data=pdf_buffer.getvalue(),
+                    data=pdf_bytes,
                     file_name=f"{agent.interview_data['job_type']}_Interview_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
                     mime="application/pdf"
                 )
@@ -573,41 +323,135 @@ def main():
         # Start New Interview
         if st.button("🔄 Start New Interview"):
             # Reset everything
-            st.session_state.agent = InterviewAgent()
+            _start_session()
             st.session_state.interview_started = False
             st.session_state.interview_completed = False
             st.session_state.current_question = None
             st.session_state.speech_answer = ""
             st.session_state.is_listening = False
             st.session_state.listening_status = ""
+            _drop_listening_job()
             st.rerun()
 
-def _process_answer(agent, final_answer):
-    """Helper function to process answers and move to next question"""
-    # Calculate score for the answer
-    score = agent.calculate_answer_score(final_answer, agent.current_difficulty)
+def _drop_listening_job():
+    """Forget the current capture, stopping it so it releases the microphone for the next one"""
+    job = st.session_state.get("listening_job")
+    if job is not None and not job["future"].done():
+        job["cancel"].set()
+    st.session_state.listening_job = None
+
+def _poll_listening_job():
+    """Show live listening status and collect the result once background capture finishes"""
+    job = st.session_state.listening_job
+    if job is None:
+        st.session_state.is_listening = False
+        return
     
-    # Store question, answer, and score
-    agent.interview_data["questions"].append(st.session_state.current_question)
-    agent.interview_data["answers"].append(final_answer)
-    agent.interview_data["difficulty_levels"].append(agent.current_difficulty)
-    agent.interview_data["scores"].append(score)
+    if not job["future"].done():
+        st.info(f"🎤 {job['status']} (listening for up to 15 seconds)")
+        if job["partial"]:
+            agent = st.session_state.agent
+            live_score = agent.calculate_answer_score(job["partial"], agent.current_difficulty)
+            st.caption(f"Heard so far: {job['partial']}")
+            st.caption(f"Live score estimate: {live_score}/10")
+        if not hasattr(st, "fragment"):
+            # Older Streamlit without fragments: re-poll with a short pause instead of blocking
+            time.sleep(0.5)
+            st.rerun()
+        return
     
-    # Evaluate answer and adjust difficulty
-    quality = agent.evaluate_answer_quality(final_answer)
-    agent.adjust_difficulty(quality)
+    try:
+        st.session_state.speech_answer = job["future"].result()
+    except Exception as e:
+        st.session_state.speech_answer = f"error: {e}"
+    st.session_state.is_listening = False
+    st.session_state.listening_status = ""
+    st.session_state.listening_job = None
+    st.rerun()
+
+if hasattr(st, "fragment"):
+    # Re-run only the status area every second while a capture is in flight
+    _poll_listening_job = st.fragment(run_every=1.0)(_poll_listening_job)
+
+def _query_session_id():
+    if hasattr(st, "query_params"):
+        return st.query_params.get("session")
+    return st.experimental_get_query_params().get("session", [None])[0]
+
+def _set_query_session_id(session_id):
+    if hasattr(st, "query_params"):
+        st.query_params["session"] = session_id
+    else:
+        st.experimental_set_query_params(session=session_id)
+
+def _start_session():
+    """Begin a fresh interview under a new session id"""
+    from session_store import new_session_id
     
-    # Move to next question
-    agent.question_count += 1
+    st.session_state.session_id = new_session_id()
+    _set_query_session_id(st.session_state.session_id)
+    st.session_state.agent = InterviewAgent()
+
+def _restore_session():
+    """Rebuild the agent from the stored events of the session in the URL, if it has any"""
+    from session_store import restore_interview
+    
+    session_id = _query_session_id()
+    events = get_session_store().events(session_id) if session_id else []
+    if not events:
+        _start_session()
+        return
+    
+    agent = InterviewAgent()
+    current_question = restore_interview(agent, events)
+    st.session_state.session_id = session_id
+    st.session_state.agent = agent
+    st.session_state.interview_started = True
+    st.session_state.interview_completed = agent.question_count >= agent.max_questions
+    st.session_state.current_question = current_question
+    if current_question is None and not st.session_state.interview_completed:
+        # The process stopped before the next question was logged
+        st.session_state.current_question = agent.get_next_question()
+        _record_question(agent)
+
+def _record_event(event_type, data):
+    """Queue an event for the session's log; the store writes it in the background"""
+    get_session_store().append(st.session_state.session_id, event_type, data)
+
+def _record_question(agent):
+    _record_event("question", {
+        "question": st.session_state.current_question,
+        "question_id": agent.current_question_id,
+        "difficulty": agent.current_difficulty
+    })
+
+def _process_answer(agent, final_answer):
+    """Helper function to process answers and move to next question"""
+    # Score and store the answer, adjust difficulty and move to next question
+    difficulty = agent.current_difficulty
+    score = agent.record_answer(st.session_state.current_question, final_answer)
+    _record_event("answer", {
+        "question": st.session_state.current_question,
+        "answer": final_answer,
+        "difficulty": difficulty,
+        "score": score,
+        "next_difficulty": agent.current_difficulty,
+        "end_time": agent.interview_data["end_time"]
+    })
     st.session_state.speech_answer = ""
     st.session_state.listening_status = ""
+    st.session_state.is_listening = False
+    _drop_listening_job()
     
     if agent.question_count >= agent.max_questions:
-        agent.interview_data["end_time"] = datetime.now()
+        from analytics_store import get_analytics_store
+        
+        get_analytics_store().append_interview(agent.interview_data, st.session_state.session_id)
         st.session_state.interview_completed = True
         st.rerun()
     else:
         st.session_state.current_question = agent.get_next_question()
+        _record_question(agent)
         st.rerun()
 
 if __name__ == "__main__":
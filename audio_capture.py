@@ -0,0 +1,188 @@
+import audioop
+import collections
+import threading
+import time
+from typing import Iterator, Optional, Tuple
+import speech_recognition as sr
+
+class ContinuousCapture:
+    """Keeps one microphone stream open and feeds a ring buffer from a reader thread.
+
+    An energy-based voice-activity detector splits the buffered audio into segments and
+    detects pauses. The energy threshold lives on the shared recognizer and keeps adapting
+    on non-speech frames, so it persists across answers without blocking recalibration.
+    """
+    def __init__(self, microphone: sr.Microphone, recognizer: sr.Recognizer,
+                 buffer_seconds: float = 30.0, calibration_seconds: float = 1.0,
+                 segment_pause: float = 0.8, preroll_seconds: float = 0.3):
+        self.microphone = microphone
+        self.recognizer = recognizer
+        self.buffer_seconds = buffer_seconds
+        self.calibration_seconds = calibration_seconds
+        self.segment_pause = segment_pause
+        self.preroll_seconds = preroll_seconds
+
+        self.source = None
+        self.frames = None
+        self.sequence = 0
+        self.last_frame_time = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._calibration_frames = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running and self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Open the microphone stream and start buffering audio"""
+        if self.running:
+            return
+        if self.source is not None:
+            # The reader stopped on a device error; the old stream must be closed before reopening
+            self._close_source()
+
+        self.source = self.microphone.__enter__()
+        self.seconds_per_chunk = self.source.CHUNK / self.source.SAMPLE_RATE
+        self.frames = collections.deque(maxlen=max(1, int(self.buffer_seconds / self.seconds_per_chunk)))
+        self._calibration_frames = int(self.calibration_seconds / self.seconds_per_chunk)
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, name="audio-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop buffering and close the microphone stream"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.source is not None:
+            self._close_source()
+
+    def _close_source(self) -> None:
+        try:
+            self.microphone.__exit__(None, None, None)
+        except Exception as e:
+            print(f"Error closing microphone stream: {e}")
+        self.source = None
+
+    def _read_loop(self) -> None:
+        while self._running:
+            try:
+                chunk = self.source.stream.read(self.source.CHUNK)
+            except Exception as e:
+                print(f"Audio capture error: {e}")
+                self._running = False
+                break
+
+            energy = audioop.rms(chunk, self.source.SAMPLE_WIDTH)
+            if self._calibration_frames > 0:
+                # Treat the first frames after opening the stream as ambient noise
+                self._calibration_frames -= 1
+                self._adapt_threshold(energy)
+
+            with self._condition:
+                self.sequence += 1
+                self.frames.append((self.sequence, chunk, energy))
+                self.last_frame_time = time.monotonic()
+                self._condition.notify_all()
+
+        with self._condition:
+            self._condition.notify_all()
+
+    def _adapt_threshold(self, energy: float) -> None:
+        """Move the energy threshold toward the ambient level, as Recognizer.listen does"""
+        recognizer = self.recognizer
+        damping = recognizer.dynamic_energy_adjustment_damping ** self.seconds_per_chunk
+        target_energy = energy * recognizer.dynamic_energy_ratio
+        recognizer.energy_threshold = recognizer.energy_threshold * damping + target_energy * (1 - damping)
+
+    def _frames_after(self, cursor: int, wait: float) -> list:
+        with self._condition:
+            if self.sequence <= cursor and self._running:
+                self._condition.wait(wait)
+            return [frame for frame in self.frames if frame[0] > cursor]
+
+    def _to_audio(self, chunks) -> sr.AudioData:
+        return sr.AudioData(b"".join(chunks), self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH)
+
+    def listen(self, timeout: float, max_pause_duration: float,
+               phrase_time_limit: Optional[float] = 5.0, idle_events: bool = False) -> Iterator[Tuple[str, object]]:
+        """Yield ("segment", AudioData) for each utterance, then ("end", reason).
+
+        reason is "pause" once speech is followed by max_pause_duration of silence,
+        "no_speech" if nothing was heard for half the timeout, or "timeout".
+        With idle_events, ("idle", None) is also yielded about every 100 ms so callers
+        can do other work, such as publishing partial transcripts, while capture runs.
+        """
+        if not self.running:
+            self.start()
+
+        seconds_per_chunk = self.seconds_per_chunk
+        preroll = collections.deque(maxlen=max(1, int(self.preroll_seconds / seconds_per_chunk)))
+        start_time = time.monotonic()
+        last_speech_time = start_time
+        heard_speech = False
+        phrase = []
+        speech_chunks = 0
+        silence_run = 0.0
+
+        with self._condition:
+            cursor = self.sequence
+
+        while True:
+            for sequence, chunk, energy in self._frames_after(cursor, wait=0.1):
+                cursor = sequence
+                is_speech = energy > self.recognizer.energy_threshold
+                if is_speech:
+                    last_speech_time = time.monotonic()
+                elif self.recognizer.dynamic_energy_threshold:
+                    self._adapt_threshold(energy)
+
+                if phrase:
+                    phrase.append(chunk)
+                    if is_speech:
+                        speech_chunks += 1
+                        silence_run = 0.0
+                    else:
+                        silence_run += seconds_per_chunk
+
+                    phrase_length = len(phrase) * seconds_per_chunk
+                    if silence_run >= self.segment_pause or (phrase_time_limit and phrase_length >= phrase_time_limit):
+                        if speech_chunks * seconds_per_chunk >= self.recognizer.phrase_threshold:
+                            heard_speech = True
+                            yield "segment", self._to_audio(phrase)
+                        phrase = []
+                        speech_chunks = 0
+                        silence_run = 0.0
+                elif is_speech:
+                    phrase = list(preroll) + [chunk]
+                    preroll.clear()
+                    speech_chunks = 1
+                    silence_run = 0.0
+                else:
+                    preroll.append(chunk)
+
+            now = time.monotonic()
+            if not self.running:
+                yield "end", "timeout"
+                return
+
+            if not phrase:
+                silence_duration = now - last_speech_time
+                if heard_speech and silence_duration > max_pause_duration:
+                    yield "end", "pause"
+                    return
+                if not heard_speech and silence_duration > timeout / 2:
+                    yield "end", "no_speech"
+                    return
+
+            if now - start_time >= timeout:
+                if phrase and speech_chunks * seconds_per_chunk >= self.recognizer.phrase_threshold:
+                    yield "segment", self._to_audio(phrase)
+                yield "end", "timeout"
+                return
+
+            if idle_events:
+                yield "idle", None
@@ -0,0 +1,265 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+class Playback:
+    """Handle for one clip handed to an AudioOutput.
+
+    done is set when the clip finishes, is cancelled or fails; status says which.
+    Callbacks registered with add_done_callback run once, on the thread that ends playback.
+    """
+    def __init__(self):
+        self.status = "playing"
+        self.done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = None
+
+    def add_done_callback(self, callback: Callable[["Playback"], None]) -> None:
+        with self._lock:
+            if not self.done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until playback ends; True only if the clip played to the end"""
+        self.done.wait(timeout)
+        return self.status == "finished"
+
+    def cancel(self) -> None:
+        if self._finish("cancelled") and self._stop is not None:
+            self._stop()
+
+    def _finish(self, status: str) -> bool:
+        with self._lock:
+            if self.done.is_set():
+                return False
+            self.status = status
+            self.done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Playback callback error: {e}")
+        return True
+
+class AudioOutput:
+    """Plays in-memory MP3 or WAV clips one at a time; starting a clip preempts the current one"""
+    name = "output"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None
+
+    def play(self, audio: bytes, audio_format: str) -> Playback:
+        playback = Playback()
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._current = playback
+        try:
+            self._start(playback, audio, audio_format)
+        except Exception as e:
+            print(f"Audio playback error: {e}")
+            playback._finish("failed")
+        return playback
+
+    def stop(self) -> None:
+        """Cancel whatever is playing"""
+        with self._lock:
+            current, self._current = self._current, None
+        if current is not None:
+            current.cancel()
+
+    def _start(self, playback: Playback, audio: bytes, audio_format: str) -> None:
+        raise NotImplementedError
+
+class PygameOutput(AudioOutput):
+    """Decodes clips into pygame Sounds and plays them on one reserved mixer channel.
+
+    The clip length is known once decoded, so a watcher thread sleeps on a condition
+    until the clip should end or is preempted, instead of polling get_busy.
+    """
+    name = "pygame"
+
+    def __init__(self):
+        super().__init__()
+        import pygame
+        self.pygame = pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self._condition = threading.Condition()
+        self._active = None
+        threading.Thread(target=self._watch, name="audio-output", daemon=True).start()
+
+    def _start(self, playback: Playback, audio: bytes, audio_format: str) -> None:
+        sound = self.pygame.mixer.Sound(file=io.BytesIO(audio))
+        playback._stop = lambda: self._stop_sound(sound)
+        with self._condition:
+            if playback.done.is_set():
+                return
+            self.channel.play(sound)
+            self._active = (playback, sound, time.monotonic() + sound.get_length())
+            self._condition.notify_all()
+
+    def _stop_sound(self, sound) -> None:
+        with self._condition:
+            if self.channel.get_sound() is sound:
+                self.channel.stop()
+            self._condition.notify_all()
+
+    def _watch(self) -> None:
+        with self._condition:
+            while True:
+                if self._active is None:
+                    self._condition.wait()
+                    continue
+
+                active = self._active
+                playback, sound, ends_at = active
+                remaining = ends_at - time.monotonic()
+                if playback.done.is_set():
+                    self._active = None
+                elif remaining > 0:
+                    self._condition.wait(remaining)
+                elif self.channel.get_sound() is sound and self.channel.get_busy():
+                    # The mixer can lag the wall clock by a buffer or two
+                    self._condition.wait(0.01)
+                else:
+                    self._active = None
+                    # Callbacks run without the lock so they can start the next clip
+                    self._condition.release()
+                    try:
+                        playback._finish("finished")
+                    finally:
+                        self._condition.acquire()
+
+class ProcessOutput(AudioOutput):
+    """Streams clips over stdin to a command-line player, so no temp file is written"""
+    name = "process"
+
+    PLAYERS = {
+        "mp3": (["mpg123", "-q", "-"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"]),
+        "wav": (["aplay", "-q", "-"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-"]),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.players = {
+            audio_format: next((command for command in commands if shutil.which(command[0])), None)
+            for audio_format, commands in self.PLAYERS.items()
+        }
+
+    def supports(self, audio_format: str) -> bool:
+        return self.players.get(audio_format) is not None
+
+    def _start(self, playback: Playback, audio: bytes, audio_format: str) -> None:
+        command = self.players.get(audio_format)
+        if command is None:
+            raise RuntimeError(f"no command-line player for {audio_format}")
+
+        process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        playback._stop = process.terminate
+        if playback.done.is_set():
+            process.terminate()
+
+        def feed():
+            try:
+                process.stdin.write(audio)
+                process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            returncode = process.wait()
+            playback._finish("finished" if returncode == 0 else "failed")
+
+        threading.Thread(target=feed, name="audio-output", daemon=True).start()
+
+class WinsoundOutput(AudioOutput):
+    """Plays WAV clips from memory with the Windows sound API"""
+    name = "winsound"
+
+    def __init__(self):
+        super().__init__()
+        import winsound
+        self.winsound = winsound
+
+    def _start(self, playback: Playback, audio: bytes, audio_format: str) -> None:
+        if audio_format != "wav":
+            raise RuntimeError(f"winsound cannot play {audio_format}")
+        winsound = self.winsound
+        playback._stop = lambda: winsound.PlaySound(None, 0)
+
+        def play():
+            # SND_MEMORY cannot be combined with SND_ASYNC, so block on a helper thread
+            winsound.PlaySound(audio, winsound.SND_MEMORY)
+            playback._finish("finished")
+
+        threading.Thread(target=play, name="audio-output", daemon=True).start()
+
+class FallbackOutput(AudioOutput):
+    """Routes each clip to the first output that can play its format"""
+    name = "fallback"
+
+    def __init__(self, outputs: List[AudioOutput]):
+        super().__init__()
+        self.outputs = outputs
+
+    def play(self, audio: bytes, audio_format: str) -> Playback:
+        # The next clip may go to a different output, so preempt here rather than per output
+        self.stop()
+        playback = None
+        for output in self.outputs:
+            if isinstance(output, ProcessOutput) and not output.supports(audio_format):
+                continue
+            playback = output.play(audio, audio_format)
+            if playback.status != "failed":
+                break
+        if playback is None:
+            playback = Playback()
+            playback._finish("failed")
+        with self._lock:
+            self._current = playback
+        return playback
+
+    def stop(self) -> None:
+        super().stop()
+        for output in self.outputs:
+            output.stop()
+
+def create_audio_output() -> AudioOutput:
+    """Build the best available outputs: pygame, then winsound on Windows, then command-line players"""
+    outputs = []
+    try:
+        outputs.append(PygameOutput())
+    except Exception as e:
+        print(f"Pygame not available, using system audio: {e}")
+    if sys.platform == "win32":
+        try:
+            outputs.append(WinsoundOutput())
+        except ImportError:
+            pass
+    if os.name != "nt" or shutil.which("ffplay"):
+        outputs.append(ProcessOutput())
+    return FallbackOutput(outputs)
+
+_audio_output = None
+_audio_output_lock = threading.Lock()
+
+def get_audio_output() -> AudioOutput:
+    """Process-wide audio output; there is one speaker, so every session shares it"""
+    global _audio_output
+    if _audio_output is None:
+        with _audio_output_lock:
+            if _audio_output is None:
+                _audio_output = create_audio_output()
+    return _audio_output
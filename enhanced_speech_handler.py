@@ -1,33 +1,79 @@
 import speech_recognition as sr
-import subprocess
-import tempfile
+import collections
 import os
 import threading
 import time
-from typing import Optional
+from typing import Callable, Iterator, Optional, Tuple
 import json
-import io
-import pygame
-import requests
-from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from audio_capture import ContinuousCapture
+from audio_output import get_audio_output
+from http_client import hedged
+from asr_backends import create_backend
+from tts_cache import render_cached
+from tts_engines import (ENGINE_FORMATS, get_pyttsx3_actor, piper_available, replace_pyttsx3_actor,
+                         split_for_speech)
+
+class SegmentTranscriber:
+    """Recognizes audio segments on a bounded pool as soon as they are captured.
+
+    Recognition overlaps with ongoing capture, and results are joined in capture
+    order, so the wait after the last segment is roughly one recognition call.
+    """
+    def __init__(self, recognize: Callable[[sr.AudioData], Optional[str]], executor: ThreadPoolExecutor):
+        self.recognize = recognize
+        self.executor = executor
+        self.futures = []
+    
+    def submit(self, audio_segment: sr.AudioData) -> None:
+        self.futures.append(self.executor.submit(self.recognize, audio_segment))
+    
+    def partial(self) -> list:
+        """Texts of the segments recognized so far, stopping at the first one still pending"""
+        parts = []
+        for future in self.futures:
+            if not future.done():
+                break
+            try:
+                text = future.result()
+            except Exception:
+                continue
+            if text and text.strip():
+                parts.append(text.strip())
+        return parts
+    
+    def results(self) -> list:
+        """Wait for every submitted segment and return the non-empty texts in order"""
+        parts = []
+        for future in self.futures:
+            try:
+                text = future.result()
+            except Exception as e:
+                print(f"Segment recognition error: {e}")
+                continue
+            if text and text.strip():
+                parts.append(text.strip())
+        return parts
 
 class SpeechHandler:
-    def __init__(self):
+    def __init__(self, recognize_segment: Optional[Callable[[sr.AudioData], Optional[str]]] = None,
+                 recognition_workers: int = 4):
         # Initialize speech recognition
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
         
-        # TTS initialization with thread safety
-        self.tts_lock = threading.Lock()
-        self.tts_engine = None
+        # Serializes microphone use when one handler is shared by several sessions
+        self.microphone_lock = threading.Lock()
         
-        # Initialize pygame mixer for audio playback
-        try:
-            pygame.mixer.init()
-            self.pygame_available = True
-        except:
-            self.pygame_available = False
-            print("Pygame not available, using system audio")
+        # Shared in-memory playback; a new utterance preempts the one playing
+        self.audio_output = get_audio_output()
+        self.speech_generation = 0
+        self.speech_lock = threading.Lock()
+        
+        # Speech chunks are synthesized ahead while earlier chunks play
+        self.synthesis_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="tts")
+        self.synthesis_lookahead = 2
+        self.tts_hedge_after = float(os.getenv("TTS_HEDGE_MS", "1500")) / 1000
         
         # Improved recognition settings
         self.recognizer.energy_threshold = 300
@@ -39,6 +85,14 @@ class SpeechHandler:
         self.recognizer.phrase_threshold = 0.3
         self.recognizer.non_speaking_duration = 1.5
         
+        # Segments are recognized in parallel while capture continues, by the
+        # backend chain configured through ASR_BACKENDS unless one is given
+        self.recognize_segment = recognize_segment or create_backend(self.recognizer)
+        self.recognition_executor = ThreadPoolExecutor(
+            max_workers=recognition_workers,
+            thread_name_prefix="recognition"
+        )
+        
         # TTS Options (in order of preference)
         self.tts_options = {
             'google_free': True,    # Free Google Translate TTS
@@ -46,312 +100,253 @@ class SpeechHandler:
             'piper': self._check_piper_available()  # Local Piper TTS
         }
         
-        # Initialize offline TTS as fallback
-        self._init_pyttsx3()
+        # Offline TTS fallback runs on a process-wide actor thread that owns the engine
+        self.tts_actor = get_pyttsx3_actor()
         
-        # Adjust for ambient noise
-        self._calibrate_microphone()
+        # One persistent capture stream; it calibrates for ambient noise from its first second of audio
+        self.capture = ContinuousCapture(self.microphone, self.recognizer)
+        self._start_capture()
     
-    def _init_pyttsx3(self):
-        """Initialize pyttsx3 engine with thread safety"""
-        try:
-            import pyttsx3
-            if hasattr(self, 'tts_engine') and self.tts_engine is not None:
-                try:
-                    self.tts_engine.stop()
-                    del self.tts_engine
-                except:
-                    pass
-            
-            self.tts_engine = pyttsx3.init()
-            self.tts_engine.setProperty('rate', 150)
-            self.tts_engine.setProperty('volume', 0.9)
-        except Exception as e:
-            print(f"Failed to initialize pyttsx3: {e}")
-            self.tts_engine = None
-
     def reset_tts_engine(self):
-        """Reset TTS engine to ensure it's ready for next use"""
-        with self.tts_lock:
-            try:
-                if self.tts_engine:
-                    self.tts_engine.stop()
-                    time.sleep(0.1)
-                    self._init_pyttsx3()
-            except Exception as e:
-                print(f"TTS reset error: {e}")
-                self.tts_engine = None
-                self._init_pyttsx3()
+        """Rebuild the pyttsx3 engine on its actor thread; only needed after repeated failures"""
+        self.tts_actor.reset()
     
     def _check_piper_available(self) -> bool:
         """Check if Piper TTS files are available"""
-        return (os.path.exists("en_US-amy-medium.onnx") and 
-                os.path.exists("en_US-amy-medium.onnx.json"))
+        return piper_available()
     
-    def _calibrate_microphone(self):
-        """Calibrate microphone for ambient noise"""
+    def _start_capture(self) -> bool:
+        """Open the persistent microphone stream if it is not already running"""
         try:
-            with self.microphone as source:
-                print("Calibrating microphone for ambient noise...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=2)
-                print(f"Energy threshold set to: {self.recognizer.energy_threshold}")
+            self.capture.start()
+            return True
         except Exception as e:
-            print(f"Microphone calibration error: {e}")
+            print(f"Microphone capture error: {e}")
+            return False
     
     def speak_text(self, text: str) -> None:
-        """Convert text to speech using the best available option"""
-        success = False
-        
-        # Try Google TTS first (free)
-        if self.tts_options['google_free'] and not success:
-            success = self._speak_with_google_free(text)
+        """Convert text to speech using the best available option.
+
+        Text is split into sentence-sized chunks, so playback starts after the first
+        chunk is ready and nothing is truncated. If an engine fails part-way, the
+        remaining chunks go to the next one.
+        """
+        generation = self._preempt_speech()
+        remaining = split_for_speech(text)
         
-        # Fallback to Piper if available
-        if not success and self.tts_options['piper']:
-            success = self._speak_with_piper(text)
+        # Try Google TTS first (free), then Piper if available; both go through the audio cache
+        for engine in ('google_free', 'piper'):
+            if remaining and self.tts_options[engine]:
+                spoken = self._speak_chunks(remaining, engine, generation)
+                remaining = remaining[spoken:]
+            if generation != self.speech_generation:
+                return
         
         # Final fallback to pyttsx3
-        if not success and self.tts_options['pyttsx3']:
-            self._speak_with_pyttsx3(text)
+        if remaining and self.tts_options['pyttsx3']:
+            self._speak_with_pyttsx3(" ".join(remaining))
+    
+    def _preempt_speech(self) -> int:
+        """Interrupt any utterance in progress and return the generation for a new one"""
+        with self.speech_lock:
+            self.speech_generation += 1
+            generation = self.speech_generation
+        self.audio_output.stop()
+        self.tts_actor.stop()
+        return generation
+    
+    def stop_speaking(self) -> None:
+        """Cut off the current utterance, e.g. when the candidate starts answering"""
+        self._preempt_speech()
+    
+    def _speak_chunks(self, chunks: list, engine: str, generation: int) -> int:
+        """Play chunks in order while the next ones are synthesized; returns how many were played"""
+        pending = collections.deque()
+        next_index = 0
+        
+        def schedule():
+            nonlocal next_index
+            while next_index < len(chunks) and len(pending) <= self.synthesis_lookahead:
+                pending.append(self.synthesis_executor.submit(self._render, chunks[next_index], engine))
+                next_index += 1
+        
+        schedule()
+        spoken = 0
+        while pending:
+            audio, audio_format = pending.popleft().result()
+            schedule()
+            if not audio or generation != self.speech_generation:
+                break
+            if not self._play_audio(audio, audio_format):
+                break
+            spoken += 1
+        
+        for future in pending:
+            future.cancel()
+        return spoken
     
-    def _speak_with_google_free(self, text: str) -> bool:
-        """Use Google Translate's free TTS service"""
+    def _render(self, chunk: str, engine: str) -> Tuple[Optional[bytes], str]:
+        """Synthesize one chunk, returning (audio, format).
+
+        A slow Google request is hedged with local Piper: if it has not answered within
+        tts_hedge_after seconds, Piper renders the chunk too and the first result plays.
+        """
+        if engine != 'google_free' or not self.tts_options['piper'] or not self.tts_hedge_after:
+            return render_cached(chunk, engine), ENGINE_FORMATS[engine]
+        
+        def render(name):
+            audio = render_cached(chunk, name)
+            if not audio:
+                raise RuntimeError(f"{name} produced no audio")
+            return audio, ENGINE_FORMATS[name]
+        
         try:
-            # Clean and prepare text
-            text = text.strip()
-            if len(text) > 200:  # Google Translate TTS has length limits
-                text = text[:200] + "..."
-            
-            # Google Translate TTS URL (free service)
-            encoded_text = quote(text)
-            url = f"https://translate.google.com/translate_tts?ie=UTF-8&tl=en&client=tw-ob&q={encoded_text}"
-            
-            # Download audio
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                # Play audio using pygame or save to temp file
-                if self.pygame_available:
-                    # Load audio data into pygame
-                    audio_data = io.BytesIO(response.content)
-                    pygame.mixer.music.load(audio_data)
-                    pygame.mixer.music.play()
-                    
-                    # Wait for playback to complete
-                    while pygame.mixer.music.get_busy():
-                        time.sleep(0.1)
-                    
-                    return True
-                else:
-                    # Save to temp file and play
-                    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                        temp_file.write(response.content)
-                        temp_path = temp_file.name
-                    
-                    # Play the file
-                    if os.name == 'nt':  # Windows
-                        os.system(f'start /wait "" "{temp_path}"')
-                    else:  # Linux/Mac
-                        subprocess.run(['mpg123', temp_path], capture_output=True)
-                    
-                    # Clean up
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
-                    
-                    return True
-            else:
-                print(f"Google TTS request failed: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            print(f"Google TTS Error: {e}")
-            return False
+            return hedged(lambda: render('google_free'), lambda: render('piper'), self.tts_hedge_after)
+        except RuntimeError:
+            return None, ENGINE_FORMATS[engine]
     
-    def _speak_with_piper(self, text: str) -> bool:
-        """Use Piper TTS for speech synthesis"""
+    def _play_audio(self, audio: bytes, audio_format: str) -> bool:
+        """Play synthesized MP3 or WAV audio from memory; True once it has played to the end"""
+        return self.audio_output.play(audio, audio_format).wait()
+    
+    def _speak_with_pyttsx3(self, text: str) -> None:
+        """Fallback TTS using pyttsx3, spoken by the actor thread"""
+        actor = self.tts_actor
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                temp_wav_path = temp_wav.name
-            
-            piper_cmd = f'echo "{text}" | piper --model en_US-amy-medium.onnx --config en_US-amy-medium.onnx.json --output_file {temp_wav_path}'
-            result = subprocess.run(piper_cmd, shell=True, capture_output=True, text=True)
-            
-            if result.returncode == 0 and os.path.exists(temp_wav_path):
-                if self.pygame_available:
-                    pygame.mixer.music.load(temp_wav_path)
-                    pygame.mixer.music.play()
-                    while pygame.mixer.music.get_busy():
-                        time.sleep(0.1)
-                else:
-                    if os.name == 'nt':
-                        os.system(f'start /wait "" "{temp_wav_path}"')
-                    else:
-                        subprocess.run(['aplay' if 'linux' in os.sys.platform else 'afplay', temp_wav_path])
-                
-                try:
-                    os.unlink(temp_wav_path)
-                except:
-                    pass
-                return True
-            else:
-                print(f"Piper TTS failed: {result.stderr}")
-                return False
-                
+            actor.say(text).result(timeout=actor.timeout_for(text))
+        except FutureTimeout:
+            # The engine is stuck in runAndWait and its thread cannot be interrupted; leave it behind
+            print("pyttsx3 stopped responding; starting a new engine")
+            self.tts_actor = replace_pyttsx3_actor(actor)
         except Exception as e:
-            print(f"Piper TTS Error: {e}")
-            return False
+            print(f"pyttsx3 TTS Error: {e}")
     
-    def _speak_with_pyttsx3(self, text: str) -> None:
-        """Fallback TTS using pyttsx3"""
-        with self.tts_lock:
-            try:
-                if self.tts_engine is None:
-                    self._init_pyttsx3()
-                
-                if self.tts_engine:
-                    try:
-                        self.tts_engine.stop()
-                        time.sleep(0.1)
-                    except:
-                        pass
-                    
-                    self.tts_engine.say(text)
-                    self.tts_engine.runAndWait()
-                    time.sleep(0.1)
-                else:
-                    print("TTS engine not available")
-                    
-            except Exception as e:
-                print(f"pyttsx3 TTS Error: {e}")
-                try:
-                    self.tts_engine = None
-                    time.sleep(0.2)
-                    self._init_pyttsx3()
-                    if self.tts_engine:
-                        self.tts_engine.say(text)
-                        self.tts_engine.runAndWait()
-                except Exception as e2:
-                    print(f"TTS reinit also failed: {e2}")
+    def listen_for_speech_with_pauses(self, timeout: int = 20, max_pause_duration: float = 3.0,
+                                      on_status: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """Enhanced speech recognition that handles pauses better.
+
+        on_status, if given, receives progress messages so a UI can show them while
+        listening runs on a background thread.
+        """
+        result = None
+        for update in self.stream_speech_with_pauses(timeout, max_pause_duration, on_status):
+            result = update["text"]
+        return result
+    
+    def stream_speech_with_pauses(self, timeout: int = 20, max_pause_duration: float = 3.0,
+                                  on_status: Optional[Callable[[str], None]] = None,
+                                  cancel: Optional[threading.Event] = None) -> Iterator[dict]:
+        """Yield {"text", "final"} updates with the partial transcript while the candidate speaks.
+
+        The last update has final=True and carries the same value listen_for_speech_with_pauses
+        returns, including "timeout", "no_speech_detected" and "unclear". Setting cancel
+        ends the capture within about 100 ms with "cancelled" and frees the microphone.
+        """
+        with self.microphone_lock:
+            if cancel is not None and cancel.is_set():
+                yield {"text": "cancelled", "final": True}
+                return
+            yield from self._stream_speech_with_pauses(timeout, max_pause_duration, on_status, cancel)
     
-    def listen_for_speech_with_pauses(self, timeout: int = 20, max_pause_duration: float = 3.0) -> Optional[str]:
-        """Enhanced speech recognition that handles pauses better"""
+    def _stream_speech_with_pauses(self, timeout: int, max_pause_duration: float,
+                                   on_status: Optional[Callable[[str], None]],
+                                   cancel: Optional[threading.Event]) -> Iterator[dict]:
+        def status(message):
+            print(message)
+            if on_status:
+                on_status(message)
+        
         try:
-            print("Listening... Speak now! (I'll wait for natural pauses)")
+            status("Listening... Speak now! (I'll wait for natural pauses)")
             
             collected_audio = []
+            transcriber = SegmentTranscriber(self.recognize_segment, self.recognition_executor)
+            partial_text = ""
             last_speech_time = time.time()
-            start_time = time.time()
             
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            if not self._start_capture():
+                yield {"text": "error: microphone unavailable", "final": True}
+                return
             
-            while (time.time() - start_time) < timeout:
-                try:
-                    with self.microphone as source:
-                        audio = self.recognizer.listen(
-                            source,
-                            timeout=1.0,
-                            phrase_time_limit=5.0
-                        )
-                    
-                    collected_audio.append(audio)
+            # Segments and pauses come from voice-activity detection on the open stream
+            for event, payload in self.capture.listen(timeout, max_pause_duration, phrase_time_limit=5.0,
+                                                      idle_events=True):
+                if event == "segment":
+                    collected_audio.append(payload)
+                    transcriber.submit(payload)
                     last_speech_time = time.time()
-                    print("Audio detected, continuing to listen...")
-                    
-                except sr.WaitTimeoutError:
+                    status("Audio detected, continuing to listen...")
+                elif event == "idle":
+                    if cancel is not None and cancel.is_set():
+                        status("Listening cancelled")
+                        yield {"text": "cancelled", "final": True}
+                        return
+                    # Publish newly recognized segments while capture continues
+                    text = " ".join(transcriber.partial())
+                    if text != partial_text:
+                        partial_text = text
+                        yield {"text": partial_text, "final": False}
+                elif payload == "pause":
                     silence_duration = time.time() - last_speech_time
-                    
-                    if collected_audio and silence_duration > max_pause_duration:
-                        print(f"Natural pause detected ({silence_duration:.1f}s), processing speech...")
-                        break
-                    elif not collected_audio and silence_duration > timeout / 2:
-                        print("No speech detected for extended period")
-                        return "timeout"
-                    continue
-                
-                except Exception as e:
-                    print(f"Audio capture error: {e}")
-                    continue
+                    status(f"Natural pause detected ({silence_duration:.1f}s), processing speech...")
+                elif payload == "no_speech":
+                    status("No speech detected for extended period")
+                    yield {"text": "timeout", "final": True}
+                    return
             
             if not collected_audio:
-                return "no_speech_detected"
-            
-            # Process collected audio
-            print("Processing collected speech...")
-            full_text_parts = []
+                yield {"text": "no_speech_detected", "final": True}
+                return
             
-            for audio_segment in collected_audio:
-                try:
-                    # Try Google Speech Recognition (free)
-                    text = self.recognizer.recognize_google(audio_segment, language='en-US')
-                    if text.strip():
-                        full_text_parts.append(text.strip())
-                        print(f"Recognized segment: {text}")
-                except sr.UnknownValueError:
-                    print("Could not understand audio segment")
-                    continue
-                except sr.RequestError as e:
-                    print(f"Speech recognition service error: {e}")
-                    # Try offline recognition as fallback
-                    try:
-                        text = self.recognizer.recognize_sphinx(audio_segment)
-                        if text.strip():
-                            full_text_parts.append(text.strip())
-                            print(f"Recognized offline: {text}")
-                    except:
-                        continue
+            # Wait for the segments still being recognized
+            status("Processing collected speech...")
+            full_text_parts = transcriber.results()
             
             if full_text_parts:
                 full_text = " ".join(full_text_parts)
                 print(f"Complete recognized text: {full_text}")
-                return full_text
+                yield {"text": full_text, "final": True}
             else:
-                return "unclear"
+                yield {"text": "unclear", "final": True}
                 
         except Exception as e:
             print(f"Speech recognition error: {e}")
-            return f"error: {e}"
+            yield {"text": f"error: {e}", "final": True}
     
     def listen_for_speech(self, timeout: int = 15, phrase_timeout: int = 8) -> Optional[str]:
         """Listen for speech with improved recognition"""
+        with self.microphone_lock:
+            return self._listen_for_speech(timeout, phrase_timeout)
+    
+    def _capture_phrase(self, timeout: int, phrase_timeout: int) -> sr.AudioData:
+        """Return the first phrase heard on the capture stream within timeout seconds"""
+        if not self._start_capture():
+            raise RuntimeError("microphone unavailable")
+        
+        # The capture reports "no_speech" after half its timeout, so ask for twice as long
+        listener = self.capture.listen(timeout * 2, max_pause_duration=0, phrase_time_limit=phrase_timeout)
+        try:
+            for event, payload in listener:
+                if event == "segment":
+                    return payload
+        finally:
+            listener.close()
+        raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+    
+    def _listen_for_speech(self, timeout: int, phrase_timeout: int) -> Optional[str]:
         try:
             print("Listening... Speak now!")
             
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.listen(
-                    source,
-                    timeout=timeout,
-                    phrase_time_limit=phrase_timeout
-                )
+            audio = self._capture_phrase(timeout, phrase_timeout)
             
             print("Processing speech...")
             
-            # Try Google Speech Recognition first (free)
-            try:
-                text = self.recognizer.recognize_google(audio, language='en-US')
+            # Configured backends, falling back past any that are failing
+            text = self.recognize_segment(audio)
+            if text:
                 print(f"Recognized: {text}")
                 return text
-            except sr.UnknownValueError:
-                print("Could not understand audio, trying alternative...")
-                try:
-                    text = self.recognizer.recognize_google(audio, language='en-IN')
-                    print(f"Recognized (alternative): {text}")
-                    return text
-                except:
-                    # Try offline recognition as last resort
-                    try:
-                        text = self.recognizer.recognize_sphinx(audio)
-                        print(f"Recognized offline: {text}")
-                        return text
-                    except:
-                        return "unclear"
+            return "unclear"
                     
         except sr.WaitTimeoutError:
             print("No speech detected within timeout period")
@@ -366,10 +361,17 @@ class SpeechHandler:
     def test_microphone(self) -> bool:
         """Test if microphone is working"""
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                print("Microphone test successful")
-                return True
+            # The capture stream should be delivering frames continuously
+            if self._start_capture():
+                deadline = time.monotonic() + 1.0
+                while time.monotonic() < deadline:
+                    last_frame_time = self.capture.last_frame_time
+                    if last_frame_time and time.monotonic() - last_frame_time < 0.5:
+                        print("Microphone test successful")
+                        return True
+                    time.sleep(0.05)
+            print("Microphone test failed: no audio frames received")
+            return False
         except Exception as e:
             print(f"Microphone test failed: {e}")
             return False
@@ -381,13 +383,20 @@ class SpeechHandler:
     def set_microphone(self, device_index: int):
         """Set specific microphone device"""
         try:
-            self.microphone = sr.Microphone(device_index=device_index)
-            self._calibrate_microphone()
-            return True
+            microphone = sr.Microphone(device_index=device_index)
+            with self.microphone_lock:
+                self.capture.stop()
+                self.microphone = microphone
+                self.capture = ContinuousCapture(self.microphone, self.recognizer)
+                return self._start_capture()
         except Exception as e:
             print(f"Failed to set microphone: {e}")
             return False
     
+    def set_recognizer(self, recognize_segment: Optional[Callable[[sr.AudioData], Optional[str]]] = None):
+        """Set the per-segment recognizer, e.g. asr_backends.StubBackend offline; None restores the configured chain"""
+        self.recognize_segment = recognize_segment or create_backend(self.recognizer)
+    
     def set_tts_preference(self, google_free=True, pyttsx3=True, piper=None):
         """Set TTS preferences"""
         self.tts_options['google_free'] = google_free
@@ -0,0 +1,125 @@
+import collections
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, TypeVar
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connect fast or give up, so a dead endpoint hands over to a local engine quickly
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "1.5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "4"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+
+# Base URLs of the online speech services; tests point them at a local stub server
+GOOGLE_TTS_URL = os.getenv("GOOGLE_TTS_URL", "https://translate.google.com/translate_tts")
+GOOGLE_ASR_URL = os.getenv("GOOGLE_ASR_URL", "http://www.google.com/speech-api/v2/recognize")
+
+T = TypeVar("T")
+
+def create_session(retries: int = HTTP_RETRIES, pool_size: int = 8) -> requests.Session:
+    """A keep-alive session that retries connection errors and 5xx responses with backoff.
+
+    Read timeouts are not retried: a stalled endpoint would otherwise cost a full read
+    timeout per attempt, and the callers already hedge to a local engine instead.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        backoff_factor=0.1,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    return session
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """Process-wide pooled session shared by every online speech call"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def default_timeout():
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+class LatencyMetrics:
+    """Call counts, error counts and latency percentiles per backend over a sliding window"""
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._calls = collections.Counter()
+        self._errors = collections.Counter()
+
+    def record(self, backend: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            samples = self._samples.get(backend)
+            if samples is None:
+                samples = self._samples[backend] = collections.deque(maxlen=self.window)
+            samples.append(seconds)
+            self._calls[backend] += 1
+            if not ok:
+                self._errors[backend] += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            samples = {backend: sorted(values) for backend, values in self._samples.items()}
+            calls = dict(self._calls)
+            errors = dict(self._errors)
+
+        def percentile(values, fraction):
+            return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+        return {
+            backend: {
+                "calls": calls[backend],
+                "errors": errors.get(backend, 0),
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": percentile(values, 0.5),
+                "p95_ms": percentile(values, 0.95),
+            }
+            for backend, values in samples.items()
+        }
+
+latency_metrics = LatencyMetrics()
+
+# Hedged calls run here rather than on the callers' pools, which may already be full
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+def hedged(primary: Callable[[], T], fallback: Callable[[], T], hedge_after: float) -> T:
+    """Return the first successful result of primary and fallback.
+
+    primary starts at once; fallback starts if primary has not answered within
+    hedge_after seconds, or as soon as primary fails. Each callable signals failure
+    by raising. If both fail, the fallback's exception propagates.
+    """
+    futures = {_hedge_executor.submit(primary): "primary"}
+    done, _ = wait(futures, timeout=hedge_after)
+    if done and next(iter(done)).exception() is None:
+        return next(iter(done)).result()
+
+    futures[_hedge_executor.submit(fallback)] = "fallback"
+    pending = set(futures)
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # The slower call keeps running in the background; its result is dropped
+                return future.result()
+            if futures[future] == "fallback" or error is None:
+                error = future.exception()
+    raise error
@@ -0,0 +1,140 @@
+from datetime import datetime
+from question_bank import get_question_bank
+from scoring import empty_match, grade_for, is_non_answer, matchers_for, overall_score, score_from_counts
+
+class InterviewCore:
+    """Question selection, scoring, difficulty adaptation and reporting, free of UI and audio imports.
+
+    Instances hold only one interview's progress; the question bank and compiled
+    keyword matchers they use are shared by every session in the process.
+    """
+    __slots__ = (
+        "question_bank", "asked_question_ids", "current_question_id", "last_match",
+        "interview_data", "current_difficulty", "question_count", "max_questions"
+    )
+    
+    def __init__(self, question_bank=None):
+        # Questions and scoring keywords are shared read-only across sessions
+        self.question_bank = question_bank or get_question_bank()
+        self.asked_question_ids = set()
+        self.current_question_id = None
+        self.last_match = None
+        
+        self.interview_data = {
+            "job_type": "",
+            "questions": [],
+            "answers": [],
+            "difficulty_levels": [],
+            "scores": [],
+            "start_time": None,
+            "end_time": None
+        }
+        
+        self.current_difficulty = "medium"
+        self.question_count = 0
+        self.max_questions = 5
+        
+    def match_keywords(self, answer, difficulty):
+        """Match scoring keywords in an answer, reusing the last result for the same input"""
+        job_type = self.interview_data["job_type"]
+        if self.last_match and self.last_match[0] == (job_type, difficulty, answer):
+            return self.last_match[1]
+        
+        matcher = matchers_for(self.question_bank).get((job_type, difficulty))
+        if matcher is None:
+            match = empty_match()
+        else:
+            match = matcher.match(answer)
+        
+        self.last_match = ((job_type, difficulty, answer), match)
+        return match
+    
+    def calculate_answer_score(self, answer, difficulty):
+        """Calculate score for an answer based on keywords and quality"""
+        if is_non_answer(answer):
+            return 0
+        
+        # Count keyword matches in a single pass
+        match = self.match_keywords(answer, difficulty)
+        return score_from_counts(match["counts"], len(answer.split()), difficulty)
+    
+    def evaluate_answer_quality(self, answer, score=None):
+        """Enhanced answer quality evaluation"""
+        if not answer or len(answer.strip()) < 10:
+            return "poor"
+        
+        if score is None:
+            score = self.calculate_answer_score(answer, self.current_difficulty)
+        
+        if score >= 7:
+            return "good"
+        elif score >= 4:
+            return "average"
+        else:
+            return "poor"
+    
+    def adjust_difficulty(self, answer_quality):
+        """Adjust difficulty based on answer quality"""
+        if answer_quality == "good" and self.current_difficulty != "hard":
+            if self.current_difficulty == "easy":
+                self.current_difficulty = "medium"
+            else:
+                self.current_difficulty = "hard"
+        elif answer_quality == "poor" and self.current_difficulty != "easy":
+            if self.current_difficulty == "hard":
+                self.current_difficulty = "medium"
+            else:
+                self.current_difficulty = "easy"
+    
+    def get_next_question(self):
+        """Get next question based on current difficulty"""
+        if self.question_count >= self.max_questions:
+            return None
+        
+        self.question_bank.maybe_reload()
+        question = self.question_bank.pick_question(
+            self.interview_data["job_type"],
+            self.current_difficulty,
+            exclude=self.asked_question_ids
+        )
+        if question is None:
+            return None
+        
+        self.asked_question_ids.add(question["id"])
+        self.current_question_id = question["id"]
+        return question["text"]
+    
+    def record_answer(self, question, answer):
+        """Score and store an answer, then adjust difficulty and move to the next question"""
+        score = self.calculate_answer_score(answer, self.current_difficulty)
+        
+        self.interview_data["questions"].append(question)
+        self.interview_data["answers"].append(answer)
+        self.interview_data["difficulty_levels"].append(self.current_difficulty)
+        self.interview_data["scores"].append(score)
+        
+        quality = self.evaluate_answer_quality(answer, score)
+        self.adjust_difficulty(quality)
+        
+        self.question_count += 1
+        if self.question_count >= self.max_questions:
+            self.interview_data["end_time"] = datetime.now()
+        return score
+    
+    def calculate_overall_score(self):
+        """Calculate overall interview score"""
+        return overall_score(self.interview_data["scores"])
+    
+    def get_grade(self, percentage):
+        """Convert percentage to letter grade"""
+        return grade_for(percentage)
+    
+    def generate_pdf_report(self):
+        """Generate enhanced PDF report with scoring"""
+        from report import generate_pdf_report
+        return generate_pdf_report(self.interview_data, self.calculate_overall_score())
+    
+    def submit_pdf_report(self):
+        """Render the report on the shared worker pool; returns a future for the PDF bytes"""
+        from report import get_report_renderer
+        return get_report_renderer().submit(self.interview_data, self.calculate_overall_score())
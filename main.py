@@ -1,23 +1,67 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, StreamingResponse
 from pydantic import BaseModel
-from langchain_community.document_loaders import PyPDFLoader
-import shutil
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import io
+import json
 import os
 import google.generativeai as genai
 from dotenv import load_dotenv
+from pdf_ingest import PdfRejected, UploadSizeLimitMiddleware, iter_page_text, open_pdf
+from summarizer import PROMPT_VERSION, SUMMARY_CONCURRENCY, MapReduceSummarizer
+from summary_cache import SummaryCache, get_summary_cache, hash_stream
 
 # Load Gemini API key
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-2.0-flash")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+# How many requests may wait, beyond the SUMMARY_CONCURRENCY running, before they get a 429
+SUMMARY_QUEUE_SIZE = int(os.getenv("SUMMARY_QUEUE_SIZE", "16"))
 
 app = FastAPI()
+app.add_middleware(UploadSizeLimitMiddleware)
 
 class SummaryResponse(BaseModel):
     summary: str
 
+@lru_cache(maxsize=1)
+def get_model():
+    """The Gemini model used for summaries; override this dependency to substitute a fake"""
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+class AdmissionLimiter:
+    """Runs at most `concurrency` jobs at once and lets at most `queue_size` more wait.
+
+    Once both are full, new requests are rejected with a 429 instead of queueing without bound.
+    """
+    def __init__(self, concurrency: int, queue_size: int):
+        self.capacity = concurrency + queue_size
+        self.admitted = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def full(self) -> bool:
+        return self.admitted >= self.capacity
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.full:
+            raise HTTPException(status_code=429, detail="Too many summaries in progress, try again shortly",
+                                headers={"Retry-After": "5"})
+        self.admitted += 1
+        try:
+            async with self._semaphore:
+                yield
+        finally:
+            self.admitted -= 1
+
+limiter = AdmissionLimiter(SUMMARY_CONCURRENCY, SUMMARY_QUEUE_SIZE)
+
 @app.get("/", response_class=HTMLResponse)
 def root():
     return """
@@ -32,21 +76,136 @@ def root():
     </html>
     """
 
-@app.post("/upload-and-summarize", response_model=SummaryResponse)
-async def upload_and_summarize(file: UploadFile = File(...)):
-    file_location = f"temp_{file.filename}"
-    with open(file_location, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+def _cache_key(content_hash: str, model) -> str:
+    model_name = getattr(model, "model_name", type(model).__name__)
+    return SummaryCache.key(content_hash, model_name, PROMPT_VERSION)
+
+def _take_upload(file: UploadFile):
+    """Detach the spooled upload from its request, which closes the UploadFile when it ends"""
+    stream, file.file = file.file, io.BytesIO()
+    return stream
 
+async def _summarize_upload(file: UploadFile, model, on_pages=None, on_progress=None, on_text=None) -> str:
+    # The summary may outlive the request that started it while other uploads of the same
+    # file wait on it, so it takes the upload over before its first await and closes it itself
+    stream = _take_upload(file)
     try:
-        loader = PyPDFLoader(file_location)
-        pages = loader.load()
-        full_text = "\n".join([p.page_content for p in pages])
+        return await _summarize_stream(stream, model, on_pages, on_progress, on_text)
+    finally:
+        stream.close()
 
-        prompt = f"Summarize this document:\n\n{full_text}"
-        response = model.generate_content(prompt)
+async def _summarize_stream(stream, model, on_pages, on_progress, on_text) -> str:
+    async with limiter.slot():
+        # Parse straight from the spooled upload (memory, or a private temp file when large)
+        try:
+            reader = await run_in_threadpool(open_pdf, stream)
+        except PdfRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
 
-        return {"summary": response.text}
-    finally:
-        if os.path.exists(file_location):
-            os.remove(file_location)
+        pages = iter_page_text(reader)
+        if on_pages is not None:
+            pages = _count_pages(pages, len(reader.pages), on_pages)
+
+        # Pages are parsed off the event loop as the summarizer asks for them, and
+        # long documents are summarized in chunks, so neither the text nor the prompt
+        # ever has to hold the whole document
+        summarizer = MapReduceSummarizer(model, on_progress=on_progress, on_text=on_text)
+        try:
+            return await summarizer.summarize(pages)
+        except PdfRejected as e:
+            # A page that fails to parse surfaces only once the summarizer reaches it
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+
+def _count_pages(pages, total, on_pages):
+    on_pages(0, total)
+    for parsed, page in enumerate(pages, 1):
+        yield page
+        on_pages(parsed, total)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/upload-and-summarize", response_model=SummaryResponse)
+async def upload_and_summarize(file: UploadFile = File(...), model=Depends(get_model)):
+    # The upload is already spooled by the server, so hashing it is one sequential read
+    content_hash = await run_in_threadpool(hash_stream, file.file)
+    key = _cache_key(content_hash, model)
+
+    # Repeat uploads are served from the cache without taking a slot, and identical
+    # uploads arriving together share one summary
+    summary = await get_summary_cache().get_or_compute(key, lambda: _summarize_upload(file, model))
+    return {"summary": summary}
+
+@app.post("/upload-and-summarize/stream")
+async def upload_and_summarize_stream(file: UploadFile = File(...), model=Depends(get_model)):
+    """Same summary as /upload-and-summarize, sent as Server-Sent Events while it is produced.
+
+    Events: `pages` ({parsed, total}) as pages are extracted, `chunk` ({done, total}) as
+    sections are summarized (total is null until the last page has been read), `reduce`
+    ({parts}) as section summaries are combined, `token` ({text}) for each piece of the
+    final summary, then `done` ({summary}) or `error` ({status, detail}).
+    """
+    content_hash = await run_in_threadpool(hash_stream, file.file)
+    key = _cache_key(content_hash, model)
+    cache = get_summary_cache()
+
+    # Reject before the stream starts, so a full server still answers with a plain 429
+    cached = await run_in_threadpool(cache.get, key)
+    if cached is None and limiter.full:
+        raise HTTPException(status_code=429, detail="Too many summaries in progress, try again shortly",
+                            headers={"Retry-After": "5"})
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    streamed = False
+
+    def emit(event: str, data: dict) -> None:
+        # Page callbacks arrive from the worker thread that extracts the text
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def on_text(text: str) -> None:
+        nonlocal streamed
+        streamed = True
+        emit("token", {"text": text})
+
+    def on_progress(progress: dict) -> None:
+        progress = dict(progress)
+        emit(progress.pop("event"), progress)
+
+    async def run():
+        try:
+            if cached is not None:
+                summary = cached
+            else:
+                summary = await cache.get_or_compute(key, lambda: _summarize_upload(
+                    file, model,
+                    on_pages=lambda parsed, total: emit("pages", {"parsed": parsed, "total": total}),
+                    on_progress=on_progress,
+                    on_text=on_text
+                ))
+            if not streamed:
+                # Cache hits and uploads that joined another request's summary arrive whole
+                emit("token", {"text": summary})
+            emit("done", {"summary": summary})
+        except HTTPException as e:
+            emit("error", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            emit("error", {"status": 500, "detail": str(e)})
+        finally:
+            emit(None, None)
+
+    async def events():
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                event, data = await queue.get()
+                if event is None:
+                    break
+                yield _sse(event, data)
+        finally:
+            # The client went away; stop waiting on its behalf. The summary itself carries on
+            # while other uploads of the same file are still waiting for it
+            task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,111 @@
+import os
+from typing import BinaryIO, Iterator
+from fastapi import HTTPException
+
+# Uploads over either limit are rejected before they are summarized
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "500"))
+
+class PdfRejected(Exception):
+    """The upload is not a PDF this service will process; status_code is the HTTP status to return"""
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def open_pdf(stream: BinaryIO, max_pages: int = MAX_PDF_PAGES):
+    """Open a PDF straight from a file-like object, such as the spooled upload.
+
+    Only the cross-reference table is read here; page content is parsed later, one
+    page at a time, by iter_page_text.
+    """
+    from pypdf import PdfReader
+    from pypdf.errors import DependencyError, PyPdfError
+
+    stream.seek(0)
+    try:
+        reader = PdfReader(stream)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise PdfRejected("Encrypted PDFs are not supported")
+        page_count = len(reader.pages)
+    except (PyPdfError, DependencyError) as e:
+        # DependencyError: e.g. AES encryption without the cryptography package installed
+        raise PdfRejected(f"Could not read PDF: {e}")
+
+    if page_count > max_pages:
+        raise PdfRejected(f"PDF has {page_count} pages; the limit is {max_pages}", status_code=413)
+    return reader
+
+def iter_page_text(reader) -> Iterator[str]:
+    """Yield each page's text, extracting a page only when it is consumed.
+
+    A page that cannot be parsed raises PdfRejected. Besides its own errors, pypdf reports
+    malformed content as KeyError, ValueError or TypeError; anything else (MemoryError, say)
+    is the server's problem, not the PDF's, and propagates as is.
+    """
+    from pypdf.errors import DependencyError, PyPdfError
+
+    for number, page in enumerate(reader.pages, 1):
+        try:
+            text = page.extract_text()
+        except (PyPdfError, DependencyError, KeyError, ValueError, TypeError) as e:
+            # Reading a closed upload raises ValueError too, but that is not the PDF's fault
+            if getattr(reader.stream, "closed", False):
+                raise
+            raise PdfRejected(f"Could not read page {number} of the PDF: {e}")
+        yield text or ""
+
+class UploadSizeLimitMiddleware:
+    """Rejects request bodies over max_bytes with a 413 before they are buffered.
+
+    A declared Content-Length is checked up front; bodies without one are counted as
+    they arrive and cut off as soon as they pass the limit.
+    """
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the body parser, so FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {self.max_bytes} bytes")
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException:
+            if response_started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = f'{{"detail":"Upload exceeds {self.max_bytes} bytes"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,145 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import NamedTuple
+
+DEFAULT_QUESTION_BANK_PATH = os.getenv(
+    "QUESTION_BANK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_bank.json")
+)
+
+class BankSnapshot(NamedTuple):
+    """One loaded version of the bank; never modified once built"""
+    version: int
+    mtime: float
+    by_level: dict
+    by_tag: dict
+    by_id: dict
+    scoring_keywords: dict
+    trades: tuple
+
+class QuestionBank:
+    """Read-only question and scoring-keyword store loaded from a JSON file.
+
+    Questions are indexed by (trade, difficulty) and by (trade, difficulty, tag) so
+    selection never scans the whole bank. The file is reloaded when its mtime changes;
+    each load builds a new BankSnapshot and swaps it in as a single reference.
+    """
+    def __init__(self, path=DEFAULT_QUESTION_BANK_PATH, reload_interval=2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._last_check = 0.0
+        self._load()
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        by_level = {}
+        by_tag = {}
+        by_id = {}
+        for question in data.get("questions", []):
+            key = (question["trade"], question["difficulty"])
+            by_level.setdefault(key, []).append(question)
+            for tag in question.get("tags", []):
+                by_tag.setdefault(key + (tag,), []).append(question)
+            by_id[question["id"]] = question
+
+        # One reference assignment, so readers see either the old bank or the new one, never a mix
+        self._snapshot = BankSnapshot(
+            version=self._snapshot.version + 1 if self._snapshot else 1,
+            mtime=mtime,
+            by_level={key: tuple(questions) for key, questions in by_level.items()},
+            by_tag={key: tuple(questions) for key, questions in by_tag.items()},
+            by_id=by_id,
+            scoring_keywords=data.get("scoring_keywords", {}),
+            trades=tuple(sorted({trade for trade, _ in by_level})),
+        )
+
+    def maybe_reload(self):
+        """Reload the bank if the file changed on disk; checks at most once per reload_interval"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return False
+            self._last_check = now
+            try:
+                if os.path.getmtime(self.path) == self._snapshot.mtime:
+                    return False
+                self._load()
+                return True
+            except (OSError, ValueError, KeyError) as e:
+                # Keep serving the previous version if the new file is missing or malformed
+                print(f"Question bank reload failed: {e}")
+                return False
+
+    @property
+    def snapshot(self):
+        """The current BankSnapshot; read several fields from one snapshot to keep them consistent"""
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    @property
+    def scoring_keywords(self):
+        return self._snapshot.scoring_keywords
+
+    def trades(self):
+        """List the trades that have questions"""
+        return list(self._snapshot.trades)
+
+    def all_questions(self):
+        """Every question in the bank"""
+        return list(self._snapshot.by_id.values())
+
+    def get_question(self, question_id):
+        return self._snapshot.by_id.get(question_id)
+
+    def questions(self, trade, difficulty, tag=None):
+        """Return the questions for a trade and difficulty, optionally restricted to a tag"""
+        snapshot = self._snapshot
+        if tag is None:
+            return snapshot.by_level.get((trade, difficulty), ())
+        return snapshot.by_tag.get((trade, difficulty, tag), ())
+
+    def pick_question(self, trade, difficulty, exclude=(), tag=None, rng=random):
+        """Pick a random question, avoiding ids in exclude while any remain.
+
+        A few random probes are almost always enough because a session asks far fewer
+        questions than the pool holds; only a nearly exhausted pool falls back to a scan.
+        """
+        pool = self.questions(trade, difficulty, tag)
+        if not pool:
+            return None
+
+        for _ in range(8):
+            question = pool[rng.randrange(len(pool))]
+            if question["id"] not in exclude:
+                return question
+
+        remaining = [question for question in pool if question["id"] not in exclude]
+        return rng.choice(remaining or pool)
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+def get_question_bank(path=DEFAULT_QUESTION_BANK_PATH):
+    """Return the process-wide QuestionBank for a file, hot-reloading it if it changed"""
+    bank = _banks.get(path)
+    if bank is None:
+        with _banks_lock:
+            bank = _banks.get(path)
+            if bank is None:
+                bank = _banks[path] = QuestionBank(path)
+    bank.maybe_reload()
+    return bank
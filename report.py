@@ -0,0 +1,276 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+import io
+from scoring import overall_score
+
+# Styles are immutable once built, so every report shares them
+STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=20,
+    textColor=colors.darkblue,
+    spaceAfter=30,
+    alignment=1
+)
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (0,-1), colors.lightgrey),
+    ('TEXTCOLOR', (0,0), (-1,-1), colors.black),
+    ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 12),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 12),
+    ('GRID', (0,0), (-1,-1), 1, colors.black)
+])
+
+SCORE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.grey),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTNAME', (0,1), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 10),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+    ('GRID', (0,0), (-1,-1), 1, colors.black)
+])
+
+def generate_pdf_report(interview_data, score_data):
+    """Generate enhanced PDF report with scoring"""
+    return io.BytesIO(render_pdf(interview_data, score_data))
+
+def render_pdf(interview_data, score_data):
+    """Render the report and return the PDF bytes"""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = []
+    
+    # Title
+    story.append(Paragraph("Interview Assessment Report", TITLE_STYLE))
+    
+    # Interview details with scoring
+    details = [
+        ["Job Type:", interview_data["job_type"]],
+        ["Date:", interview_data["end_time"].strftime("%Y-%m-%d")],
+        ["Duration:", f"{(interview_data['end_time'] - interview_data['start_time']).seconds // 60} minutes"],
+        ["Questions Asked:", str(len(interview_data["questions"]))],
+        ["Overall Score:", f"{score_data['total_points']}/{score_data['max_possible']} ({score_data['percentage']}%)"],
+        ["Grade:", score_data['grade']],
+        ["Average per Question:", f"{score_data['average_per_question']}/10"]
+    ]
+    
+    detail_table = Table(details, colWidths=[2*inch, 4*inch])
+    detail_table.setStyle(DETAIL_TABLE_STYLE)
+    
+    story.append(detail_table)
+    story.append(Spacer(1, 20))
+    
+    # Performance Analysis
+    story.append(Paragraph("Performance Analysis", STYLES['Heading2']))
+    performance_text = f"""
+    <b>Overall Performance:</b> {score_data['grade']} ({score_data['percentage']}%)<br/>
+    <b>Strengths:</b> {'Good technical knowledge' if score_data['percentage'] > 70 else 'Room for improvement in technical areas'}<br/>
+    <b>Areas for Improvement:</b> {'Continue building on strong foundation' if score_data['percentage'] > 70 else 'Focus on technical terminology and detailed explanations'}
+    """
+    story.append(Paragraph(performance_text, STYLES['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Score breakdown table
+    score_breakdown = [["Question", "Difficulty", "Score", "Answer Quality"]]
+    for i, (score, difficulty) in enumerate(zip(interview_data["scores"], interview_data["difficulty_levels"])):
+        quality = "Excellent" if score >= 8 else "Good" if score >= 6 else "Average" if score >= 4 else "Poor"
+        score_breakdown.append([f"Q{i+1}", difficulty.title(), f"{score}/10", quality])
+    
+    score_table = Table(score_breakdown, colWidths=[1*inch, 1.5*inch, 1*inch, 1.5*inch])
+    score_table.setStyle(SCORE_TABLE_STYLE)
+    
+    story.append(Paragraph("Score Breakdown", STYLES['Heading3']))
+    story.append(score_table)
+    story.append(Spacer(1, 20))
+    
+    # Questions and answers
+    story.append(Paragraph("Interview Questions & Answers", STYLES['Heading2']))
+    story.append(Spacer(1, 12))
+    
+    for i, (question, answer, difficulty, score) in enumerate(zip(
+        interview_data["questions"], 
+        interview_data["answers"],
+        interview_data["difficulty_levels"],
+        interview_data["scores"]
+    )):
+        # Question with score
+        story.append(Paragraph(f"<b>Question {i+1} (Difficulty: {difficulty.title()}) - Score: {score}/10</b>", STYLES['Normal']))
+        story.append(Paragraph(question, STYLES['Normal']))
+        story.append(Spacer(1, 6))
+        
+        # Answer
+        story.append(Paragraph("<b>Answer:</b>", STYLES['Normal']))
+        story.append(Paragraph(answer, STYLES['Normal']))
+        story.append(Spacer(1, 12))
+    
+    doc.build(story)
+    return buffer.getvalue()
+
+def report_key(interview_data):
+    """Hash of the interview record; the report is a pure function of it"""
+    payload = json.dumps(interview_data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ReportRenderer:
+    """Renders reports on a small thread pool and keeps the most recent PDFs.
+
+    Threads rather than processes: the app process runs audio, speech and server threads, so
+    forking it risks a child deadlocked on a lock held at fork time, and spawning re-imports the
+    Streamlit script in every worker. One report renders in tens of milliseconds.
+
+    The cache holds futures, so repeated requests for the same interview, including
+    clicks while it is still rendering, share one render.
+    """
+    def __init__(self, max_workers=None, cache_size=64):
+        self.max_workers = max_workers or min(2, os.cpu_count() or 1)
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="report")
+        return self._executor
+
+    def submit(self, interview_data, score_data) -> Future:
+        """Return a future for the PDF bytes, rendering only on a cache miss"""
+        key = report_key(interview_data)
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self._cache.move_to_end(key)
+                return future
+            future = self._get_executor().submit(render_pdf, interview_data, score_data)
+            self._cache[key] = future
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        future.add_done_callback(lambda done: self._forget_failed(key, done))
+        return future
+
+    def _forget_failed(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_report_renderer():
+    """Process-wide report renderer"""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = ReportRenderer()
+    return _renderer
+
+def normalize_record(record):
+    """Copy of a stored interview record with ISO-string times parsed to datetimes"""
+    record = dict(record)
+    for field in ("start_time", "end_time"):
+        if isinstance(record.get(field), str):
+            record[field] = datetime.fromisoformat(record[field])
+    return record
+
+def report_filename(index, record):
+    """Archive name for a record's report, unique within one export"""
+    record_id = record.get("id") or record.get("session_id")
+    stem = record_id if record_id else f"{index:05d}_{record['job_type']}_{record['end_time']:%Y%m%d_%H%M%S}"
+    return f"{stem}.pdf".replace("/", "_")
+
+def _render_record(index, record):
+    record = normalize_record(record)
+    score_data = record.get("score_data") or overall_score(record["scores"])
+    return report_filename(index, record), render_pdf(record, score_data)
+
+def export_reports(records, output, processes=None, max_in_flight=None):
+    """Render a report for each stored interview record into a ZIP archive.
+
+    Records are rendered across a process pool and written to the archive as they
+    finish, with at most max_in_flight renders outstanding, so memory stays bounded
+    however many records there are. output is a path or a writable binary file.
+    Returns counts, elapsed seconds and throughput in reports per second.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    import time
+    import zipfile
+
+    processes = processes or os.cpu_count() or 1
+    max_in_flight = max_in_flight or processes * 4
+    exported = 0
+    failed = 0
+    start = time.perf_counter()
+
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending, exported, failed
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                try:
+                    filename, pdf = future.result()
+                except Exception as e:
+                    print(f"Report export failed: {e}")
+                    failed += 1
+                    continue
+                archive.writestr(filename, pdf)
+                exported += 1
+
+        for index, record in enumerate(records):
+            if len(pending) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+            pending.add(executor.submit(_render_record, index, record))
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "reports": exported,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "reports_per_second": round(exported / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+def read_records(path):
+    """Yield interview records from a JSON array file or a JSON Lines file"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render PDF reports for stored interview records into a ZIP archive")
+    parser.add_argument("input", help="JSON array or .jsonl file of interview records")
+    parser.add_argument("output", help="ZIP file to write")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    stats = export_reports(read_records(args.input), args.output, processes=args.processes)
+    print(f"Exported {stats['reports']} reports ({stats['failed']} failed) in {stats['seconds']}s, "
+          f"{stats['reports_per_second']} reports/s")
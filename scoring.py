@@ -0,0 +1,242 @@
+import threading
+from question_bank import get_question_bank
+
+TIER_WEIGHTS = {"high_value": 3, "medium_value": 2, "basic_value": 1}
+DIFFICULTY_MULTIPLIERS = {"easy": 0.8, "medium": 1.0, "hard": 1.2}
+NON_ANSWERS = ("skipped", "timeout", "unclear", "no_speech_detected")
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over one keyword table, scanning an answer in a single pass.
+
+    Keywords match case-insensitively from the start of a word, so stems such as
+    "pipe" still match "pipes"; all-caps acronyms ("AC", "NEC") must match a whole word.
+    """
+    TIERS = ("high_value", "medium_value", "basic_value")
+
+    def __init__(self, keyword_tiers):
+        self.keyword_tiers = keyword_tiers
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for tier in self.TIERS:
+            for keyword in keyword_tiers.get(tier, []):
+                self._add_keyword(keyword, tier)
+        self._build_failure_links()
+
+    def _add_keyword(self, keyword, tier):
+        state = 0
+        for char in keyword.lower():
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._outputs[state].append((keyword, tier, len(keyword), keyword.isupper()))
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+                queue.append(child)
+
+    def match(self, answer):
+        """Return per-tier hit counts and the keywords that matched in the answer"""
+        text = answer.lower()
+        text_length = len(text)
+        matched = {tier: [] for tier in self.TIERS}
+        seen = set()
+        state = 0
+
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            for keyword, tier, length, whole_word in self._outputs[state]:
+                if (keyword, tier) in seen:
+                    continue
+                start = index - length + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if whole_word and index + 1 < text_length and text[index + 1].isalnum():
+                    continue
+                seen.add((keyword, tier))
+                matched[tier].append(keyword)
+
+        return {
+            "counts": {tier: len(keywords) for tier, keywords in matched.items()},
+            "matched": matched
+        }
+
+def build_matchers(scoring_keywords=None):
+    """Compile one KeywordMatcher per (job_type, difficulty)"""
+    if scoring_keywords is None:
+        return matchers_for(get_question_bank())
+    return {
+        (job_type, difficulty): KeywordMatcher(tiers)
+        for job_type, levels in scoring_keywords.items()
+        for difficulty, tiers in levels.items()
+    }
+
+_matcher_cache = {}
+_matcher_lock = threading.Lock()
+
+def matchers_for(question_bank):
+    """Compiled matchers for a question bank's keyword tables, rebuilt only when the bank reloads"""
+    snapshot = question_bank.snapshot
+    cached = _matcher_cache.get(question_bank.path)
+    if cached is None or cached[0] != snapshot.version:
+        with _matcher_lock:
+            cached = _matcher_cache.get(question_bank.path)
+            if cached is None or cached[0] != snapshot.version:
+                cached = (snapshot.version, build_matchers(snapshot.scoring_keywords))
+                _matcher_cache[question_bank.path] = cached
+    return cached[1]
+
+def empty_match():
+    """Match result for answers with no keyword table"""
+    return {
+        "counts": {tier: 0 for tier in KeywordMatcher.TIERS},
+        "matched": {tier: [] for tier in KeywordMatcher.TIERS}
+    }
+
+def is_non_answer(answer):
+    """True for empty, skipped or failed-recognition answers, which always score 0"""
+    return not answer or answer.lower() in NON_ANSWERS
+
+def score_from_counts(counts, word_count, difficulty):
+    """Apply the scoring formula to per-tier keyword hit counts"""
+    high_value_matches = counts["high_value"]
+    
+    # Calculate base score from keywords
+    keyword_score = sum(counts[tier] * weight for tier, weight in TIER_WEIGHTS.items())
+    
+    # Adjust score based on answer length and completeness
+    length_multiplier = min(1.0, word_count / 20)  # Optimal around 20 words
+    
+    # Calculate final score (0-10)
+    base_score = min(10, keyword_score * length_multiplier)
+    
+    # Bonus for comprehensive answers
+    if word_count > 30 and high_value_matches > 0:
+        base_score = min(10, base_score + 1)
+    
+    # Difficulty adjustment
+    final_score = min(10, base_score * DIFFICULTY_MULTIPLIERS.get(difficulty, 1.0))
+    
+    return round(final_score, 1)
+
+def grade_for(percentage):
+    """Convert percentage to letter grade"""
+    if percentage >= 90:
+        return "A+"
+    elif percentage >= 80:
+        return "A"
+    elif percentage >= 70:
+        return "B"
+    elif percentage >= 60:
+        return "C"
+    elif percentage >= 50:
+        return "D"
+    else:
+        return "F"
+
+def overall_score(scores):
+    """Summarize an interview's per-question scores; 0 if nothing was scored"""
+    if not scores:
+        return 0
+    
+    total_score = sum(scores)
+    max_possible = len(scores) * 10
+    percentage = (total_score / max_possible) * 100 if max_possible > 0 else 0
+    
+    return {
+        "total_points": total_score,
+        "max_possible": max_possible,
+        "percentage": round(percentage, 1),
+        "grade": grade_for(percentage),
+        "average_per_question": round(total_score / len(scores), 1)
+    }
+
+class BatchScorer:
+    """Scores many answers at once without building an InterviewAgent.
+
+    Each answer is matched against its keyword table in one Aho-Corasick pass and scored
+    with score_from_counts, so results are identical to the interview path. Matching is
+    the whole cost; score_answers spreads large inputs across a process pool.
+    """
+    def __init__(self, scoring_keywords=None):
+        self.matchers = build_matchers(scoring_keywords)
+
+    def score(self, records):
+        """Score (job_type, difficulty, answer) records, returning a list of scores in input order"""
+        scores = []
+        for job_type, difficulty, answer in records:
+            matcher = self.matchers.get((job_type, difficulty))
+            if is_non_answer(answer) or matcher is None:
+                scores.append(0)
+                continue
+            counts = matcher.match(answer)["counts"]
+            scores.append(score_from_counts(counts, len(answer.split()), difficulty))
+        return scores
+
+_worker_scorer = None
+
+def _init_worker(scoring_keywords):
+    global _worker_scorer
+    _worker_scorer = BatchScorer(scoring_keywords)
+
+def _score_chunk(records):
+    return _worker_scorer.score(records)
+
+def score_answers(records, scoring_keywords=None, processes=None, chunk_size=5000):
+    """Batch-score (job_type, difficulty, answer) records from an iterable or DataFrame.
+
+    Set processes to spread chunks of chunk_size records across a process pool.
+    DataFrame input returns a Series aligned to its index, otherwise a list.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    frame = None
+    if hasattr(records, "itertuples"):
+        frame = records
+        records = frame[["job_type", "difficulty", "answer"]].itertuples(index=False, name=None)
+    records = list(records)
+
+    if processes and len(records) > chunk_size:
+        chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(scoring_keywords,)
+        ) as executor:
+            scores = [score for chunk_scores in executor.map(_score_chunk, chunks) for score in chunk_scores]
+    else:
+        scores = BatchScorer(scoring_keywords).score(records)
+
+    if frame is not None:
+        import pandas as pd
+        return pd.Series(scores, index=frame.index, name="score")
+    return scores
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Re-grade stored answers from a CSV with job_type, difficulty and answer columns")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    transcripts = pd.read_csv(args.input, keep_default_na=False)
+    transcripts["score"] = score_answers(transcripts, processes=args.processes)
+    transcripts.to_csv(args.output, index=False)
@@ -0,0 +1,190 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+
+DEFAULT_SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "sqlite:///interview_sessions.db")
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class SessionStore:
+    """Append-only log of interview events, keyed by session id.
+
+    append must be cheap enough to call on the answer path; events returns a
+    session's events in the order they were appended.
+    """
+    def append(self, session_id, event_type, data):
+        raise NotImplementedError
+
+    def events(self, session_id):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class MemorySessionStore(SessionStore):
+    """Keeps events in process memory, for tests and single-process runs without persistence"""
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def append(self, session_id, event_type, data):
+        with self._lock:
+            self._events.setdefault(session_id, []).append((event_type, json.loads(json.dumps(data, default=_encode))))
+
+    def events(self, session_id):
+        with self._lock:
+            return list(self._events.get(session_id, ()))
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite event log written by a background thread in batched transactions.
+
+    append only enqueues; the writer commits whatever has queued up, at most every
+    flush_interval seconds, so several sessions' answers share one fsync. Readers
+    flush first, so a reconnecting session always sees its own latest events.
+    """
+    def __init__(self, path, flush_interval=0.2, max_batch=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._local = threading.local()
+
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session_id TEXT NOT NULL,"
+                " event_type TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS events_session ON events (session_id, id)")
+
+        self._writer = threading.Thread(target=self._write_loop, name="session-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def append(self, session_id, event_type, data):
+        row = (session_id, event_type, json.dumps(data, default=_encode), time.time())
+        self._queue.put(row)
+
+    def flush(self, timeout=None):
+        """Block until everything appended so far is committed; raises the database error if that failed"""
+        done = Future()
+        self._queue.put(done)
+        done.result(timeout)
+
+    def events(self, session_id):
+        self.flush()
+        rows = self._reader().execute(
+            "SELECT event_type, data FROM events WHERE session_id = ? ORDER BY id",
+            (session_id,)
+        ).fetchall()
+        return [(event_type, json.loads(data)) for event_type, data in rows]
+
+    def _write_loop(self):
+        connection = self._connect()
+        # Rows whose write failed; they are retried, with backoff, ahead of anything newer
+        pending = []
+        retry_delay = 0.0
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=retry_delay if pending else None))
+            except queue.Empty:
+                pass
+            # Let concurrent appends pile up briefly so they commit together
+            deadline = time.monotonic() + self.flush_interval
+            while batch and len(batch) < self.max_batch and not isinstance(batch[-1], Future):
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            rows = pending + [item for item in batch if not isinstance(item, Future)]
+            waiters = [item for item in batch if isinstance(item, Future)]
+            error = None
+            try:
+                if rows:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO events (session_id, event_type, data, created_at) VALUES (?, ?, ?, ?)",
+                            rows
+                        )
+                pending = []
+                retry_delay = 0.0
+            except sqlite3.Error as e:
+                print(f"Session store write failed, will retry {len(rows)} events: {e}")
+                error = e
+                pending = rows
+                retry_delay = min(max(retry_delay * 2, 0.1), 5.0)
+            for waiter in waiters:
+                if error is None:
+                    waiter.set_result(len(rows))
+                else:
+                    # The events are not committed yet, so flush() and events() must not pretend they are
+                    waiter.set_exception(error)
+
+def create_session_store(url=DEFAULT_SESSION_STORE_URL):
+    """Build a store from a URL: sqlite:///path/to/file.db or memory://"""
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):])
+    if url.startswith("memory://"):
+        return MemorySessionStore()
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+def restore_interview(core, events):
+    """Replay a session's events onto a fresh InterviewCore.
+
+    Answers are restored with the scores they were given, not re-scored, so a
+    changed question bank cannot alter an interview in progress. Returns the
+    question awaiting an answer, or None.
+    """
+    current_question = None
+    for event_type, data in events:
+        if event_type == "started":
+            core.interview_data["job_type"] = data["job_type"]
+            core.interview_data["start_time"] = datetime.fromisoformat(data["start_time"])
+            core.max_questions = data.get("max_questions", core.max_questions)
+        elif event_type == "question":
+            current_question = data["question"]
+            core.current_difficulty = data["difficulty"]
+            if data.get("question_id"):
+                core.asked_question_ids.add(data["question_id"])
+        elif event_type == "answer":
+            core.interview_data["questions"].append(data["question"])
+            core.interview_data["answers"].append(data["answer"])
+            core.interview_data["difficulty_levels"].append(data["difficulty"])
+            core.interview_data["scores"].append(data["score"])
+            core.current_difficulty = data["next_difficulty"]
+            core.question_count += 1
+            if data.get("end_time"):
+                core.interview_data["end_time"] = datetime.fromisoformat(data["end_time"])
+            current_question = None
+    return current_question
@@ -0,0 +1,233 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional
+from fastapi.concurrency import run_in_threadpool
+
+# Summaries running at once per worker; main.py admits requests against this limit
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+# Rough size of a chunk sent to the model, and how many chunks are summarized at once per document
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+SUMMARY_PARALLELISM = int(os.getenv("SUMMARY_PARALLELISM", "4"))
+
+# Bump whenever the prompts change so cached summaries from the old prompts are not reused
+PROMPT_VERSION = "1"
+
+DOCUMENT_PROMPT = "Summarize this document:\n\n{text}"
+MAP_PROMPT = "Summarize this section of a longer document. Keep names, figures and key facts:\n\n{text}"
+REDUCE_PROMPT = ("These are summaries of consecutive sections of one document, in order. "
+                 "Combine them into a single summary of the whole document:\n\n{text}")
+
+# Blocking model clients run here so they never hold up the event loop; one thread
+# for every model call the admitted summaries can have in flight
+_model_executor = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY * SUMMARY_PARALLELISM,
+                                     thread_name_prefix="llm")
+
+async def generate_text(model, prompt: str) -> str:
+    """Call the model without blocking the event loop, preferring its native async API"""
+    if hasattr(model, "generate_content_async"):
+        response = await model.generate_content_async(prompt)
+    else:
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(_model_executor, model.generate_content, prompt)
+    return response.text
+
+async def stream_text(model, prompt: str) -> AsyncIterator[str]:
+    """Yield the model's response in pieces as they are generated"""
+    if hasattr(model, "generate_content_async"):
+        response = await model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            yield chunk.text
+    else:
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(_model_executor, partial(model.generate_content, prompt, stream=True))
+        chunks = iter(response)
+        while True:
+            chunk = await loop.run_in_executor(_model_executor, next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk.text
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count; about four characters per token for English text"""
+    return len(text) // 4 + 1
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """Split text into pieces of at most max_chars, at paragraph, then line, then any boundary"""
+    if len(text) <= max_chars:
+        return [text]
+    for separator in ("\n\n", "\n", " "):
+        parts = text.split(separator)
+        if len(parts) > 1:
+            pieces = []
+            current = ""
+            for part in parts:
+                candidate = f"{current}{separator}{part}" if current else part
+                if len(candidate) <= max_chars:
+                    current = candidate
+                    continue
+                if current:
+                    pieces.append(current)
+                if len(part) > max_chars:
+                    pieces.extend(split_text(part, max_chars))
+                    current = ""
+                else:
+                    current = part
+            if current:
+                pieces.append(current)
+            return pieces
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+def chunk_pages(pages: Iterable[str], max_tokens: int = SUMMARY_CHUNK_TOKENS) -> Iterator[str]:
+    """Group page texts into chunks of about max_tokens, pulling pages only as chunks are needed"""
+    max_chars = max_tokens * 4
+    current = []
+    size = 0
+    for page in pages:
+        for piece in split_text(page, max_chars):
+            if current and size + len(piece) + 1 > max_chars:
+                yield "\n".join(current)
+                current = []
+                size = 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        yield "\n".join(current)
+
+class MapReduceSummarizer:
+    """Summarizes a document of any length within a fixed context and memory budget.
+
+    Chunks are summarized concurrently (map), at most `parallelism` at a time, and only
+    that many chunks of source text are held at once. Section summaries are folded into
+    a running stack as they arrive in document order: whenever a level would exceed the
+    chunk budget it is combined (reduce) into one summary on the level above, so memory
+    grows with the logarithm of the document length rather than the length itself.
+
+    If on_text is given, the final call (the whole document, or the last reduce) is
+    streamed and each piece of the summary is passed to it as it is generated.
+    """
+    def __init__(self, model, chunk_tokens: int = SUMMARY_CHUNK_TOKENS, parallelism: int = SUMMARY_PARALLELISM,
+                 on_progress: Optional[Callable[[dict], None]] = None,
+                 on_text: Optional[Callable[[str], None]] = None):
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.parallelism = parallelism
+        self.on_progress = on_progress
+        self.on_text = on_text
+        self._semaphore = asyncio.Semaphore(parallelism)
+
+    def _progress(self, **event) -> None:
+        if self.on_progress is not None:
+            self.on_progress(event)
+
+    async def _generate(self, prompt: str) -> str:
+        async with self._semaphore:
+            return await generate_text(self.model, prompt)
+
+    async def _generate_final(self, prompt: str) -> str:
+        if self.on_text is None:
+            return await self._generate(prompt)
+        pieces = []
+        async with self._semaphore:
+            async for piece in stream_text(self.model, prompt):
+                pieces.append(piece)
+                self.on_text(piece)
+        return "".join(pieces)
+
+    async def summarize(self, pages: Iterable[str]) -> str:
+        """Summarize page texts; pages may be a lazy iterator and is consumed off the event loop"""
+        chunks = chunk_pages(pages, self.chunk_tokens)
+        first = await run_in_threadpool(next, chunks, None)
+        if first is None:
+            return ""
+        second = await run_in_threadpool(next, chunks, None)
+        if second is None:
+            # Short documents take a single call, as before
+            summary = await self._generate_final(DOCUMENT_PROMPT.format(text=first))
+            self._progress(event="chunk", done=1, total=1)
+            return summary
+
+        levels = []
+        pending = {}
+        finished = {}
+        lookahead = [first, second]
+        next_index = 0
+        next_to_fold = 0
+        exhausted = False
+        total = None
+
+        try:
+            while True:
+                # Keep up to `parallelism` chunks in flight, reading more pages only as slots free up
+                while not exhausted and len(pending) + len(finished) < self.parallelism:
+                    chunk = lookahead.pop(0) if lookahead else await run_in_threadpool(next, chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        total = next_index
+                        break
+                    pending[next_index] = asyncio.ensure_future(self._generate(MAP_PROMPT.format(text=chunk)))
+                    next_index += 1
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending.values(), return_when=asyncio.FIRST_COMPLETED)
+                for index, task in list(pending.items()):
+                    if task in done:
+                        del pending[index]
+                        finished[index] = task.result()
+
+                while next_to_fold in finished:
+                    await self._fold(levels, 0, finished.pop(next_to_fold))
+                    next_to_fold += 1
+                    self._progress(event="chunk", done=next_to_fold, total=total)
+        finally:
+            # On failure or cancellation, stop the other sections and observe any that already failed
+            for task in pending.values():
+                if not task.cancel() and not task.cancelled():
+                    task.exception()
+
+        # Higher levels cover earlier parts of the document
+        parts = [summary for level in reversed(levels) for summary in level]
+        return await self._reduce_all(parts)
+
+    async def _fold(self, levels: list, level: int, summary: str) -> None:
+        if level == len(levels):
+            levels.append([])
+        items = levels[level]
+        if items and sum(estimate_tokens(item) for item in items) + estimate_tokens(summary) > self.chunk_tokens:
+            combined = await self._reduce(items)
+            levels[level] = [summary]
+            await self._fold(levels, level + 1, combined)
+            # The combined summary precedes this level's new items
+            return
+        items.append(summary)
+
+    async def _reduce(self, summaries: List[str], final: bool = False) -> str:
+        self._progress(event="reduce", parts=len(summaries))
+        prompt = REDUCE_PROMPT.format(text="\n\n".join(summaries))
+        return await (self._generate_final(prompt) if final else self._generate(prompt))
+
+    async def _reduce_all(self, parts: List[str]) -> str:
+        """Combine summaries into one, in token-bounded batches and recursively if needed"""
+        while len(parts) > 1:
+            batches = [[]]
+            size = 0
+            for part in parts:
+                tokens = estimate_tokens(part)
+                if batches[-1] and size + tokens > self.chunk_tokens:
+                    batches.append([])
+                    size = 0
+                batches[-1].append(part)
+                size += tokens
+            if len(batches) == len(parts):
+                # Every part fills a batch by itself; pair them up so the reduction still converges
+                batches = [parts[i:i + 2] for i in range(0, len(parts), 2)]
+            if len(batches) == 1:
+                return await self._reduce(batches[0], final=True)
+            parts = await asyncio.gather(*(self._reduce(batch) for batch in batches))
+        if parts and self.on_text is not None:
+            self.on_text(parts[0])
+        return parts[0] if parts else ""
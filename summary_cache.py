@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+from fastapi.concurrency import run_in_threadpool
+
+DEFAULT_SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.db")
+DEFAULT_SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_SUMMARY_CACHE_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+def hash_stream(stream, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a binary stream, read block by block; leaves the stream rewound"""
+    digest = hashlib.sha256()
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+class SummaryCache:
+    """Persistent summary cache in SQLite, keyed by (content hash, model, prompt version).
+
+    Entries expire after ttl seconds; once the stored summaries exceed max_bytes the
+    least recently used are evicted. get_or_compute also deduplicates concurrent
+    misses for the same key, so identical uploads share one model call.
+    """
+    def __init__(self, path: str = DEFAULT_SUMMARY_CACHE_PATH, ttl: float = DEFAULT_SUMMARY_CACHE_TTL,
+                 max_bytes: int = DEFAULT_SUMMARY_CACHE_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._inflight = {}
+
+        with self._connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY,"
+                " summary TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=30)
+        return connection
+
+    @staticmethod
+    def key(content_hash: str, model_name: str, prompt_version: str) -> str:
+        return f"{content_hash}:{model_name}:{prompt_version}"
+
+    def get(self, key: str) -> Optional[str]:
+        connection = self._connection()
+        row = connection.execute("SELECT summary, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        summary, created_at = row
+        now = time.time()
+        with self._write_lock, connection:
+            if now - created_at > self.ttl:
+                connection.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (now, key))
+        return summary
+
+    def put(self, key: str, summary: str) -> None:
+        connection = self._connection()
+        now = time.time()
+        size = len(summary.encode("utf-8"))
+        with self._write_lock, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, summary, size, now, now)
+            )
+            connection.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from least recently used until enough has been freed
+                excess = total - self.max_bytes
+                evict = []
+                for old_key, old_size in connection.execute("SELECT key, size FROM summaries ORDER BY last_used"):
+                    if excess <= 0:
+                        break
+                    if old_key != key:
+                        evict.append((old_key,))
+                        excess -= old_size
+                connection.executemany("DELETE FROM summaries WHERE key = ?", evict)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached summary, or run compute once however many callers miss at the same time.
+
+        compute runs in a task of its own, so a caller that is cancelled (say, its client
+        disconnected) does not take the others down with it; the work is only cancelled
+        once nobody is waiting for it.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            summary = await run_in_threadpool(self.get, key)
+            if summary is not None:
+                return summary
+
+            # Re-check: another request may have started computing while we read the cache
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = self._inflight[key] = _Inflight(asyncio.ensure_future(self._compute(key, compute)))
+                inflight.task.add_done_callback(lambda _: self._forget(key, inflight))
+
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if inflight.waiters == 0 and not inflight.task.done():
+                # Later requests for this key start afresh rather than join a cancelled task
+                self._forget(key, inflight)
+                inflight.task.cancel()
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        summary = await compute()
+        await run_in_threadpool(self.put, key, summary)
+        return summary
+
+    def _forget(self, key: str, inflight: "_Inflight") -> None:
+        if self._inflight.get(key) is inflight:
+            del self._inflight[key]
+
+class _Inflight:
+    """A summary being computed, and how many callers are waiting for it"""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_summary_cache() -> SummaryCache:
+    """Process-wide summary cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SummaryCache()
+    return _cache
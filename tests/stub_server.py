@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Dict
+
+class StubServer:
+    """Local HTTP server returning canned responses, for exercising the online clients offline.
+
+    routes maps a path such as "/translate_tts" to (status, body, delay_seconds).
+    Use as a context manager; base_url is set once the server is listening.
+    """
+    def __init__(self, routes: Dict[str, tuple]):
+        self.routes = routes
+        self.requests = []
+        self.base_url = None
+        self._server = None
+
+    def __enter__(self) -> "StubServer":
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                path = self.path.split("?", 1)[0]
+                stub.requests.append((self.command, self.path, body))
+                status, payload, delay = stub.routes.get(path, (404, b"", 0))
+                if delay:
+                    time.sleep(delay)
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out on a delayed route and has gone away
+                    pass
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="stub-http", daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+sr = pytest.importorskip("speech_recognition")
+
+from asr_backends import CircuitBreaker, FallbackBackend, GoogleBackend, RecognizerBackend, StubBackend
+from stub_server import StubServer
+
+class FlakyBackend(RecognizerBackend):
+    name = "flaky"
+
+    def __init__(self, error, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize(self, audio_segment):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return "recovered"
+
+def _audio():
+    return sr.AudioData(bytes(3200), 16000, 2)
+
+@pytest.mark.parametrize("error", [sr.RequestError("down"), ValueError("not json"), RuntimeError("decoder")])
+def test_any_backend_error_falls_through_to_the_next_backend(error):
+    flaky = FlakyBackend(error)
+    fallback = FallbackBackend([flaky, StubBackend(["offline text"] * 5)], failure_threshold=2)
+
+    assert fallback.recognize(_audio()) == "offline text"
+    assert fallback.recognize(_audio()) == "offline text"
+    # Two failures open the breaker, so the broken backend is no longer called
+    assert fallback.breakers["flaky"].state == "open"
+    assert fallback.recognize(_audio()) == "offline text"
+    assert flaky.calls == 2
+
+def test_google_backend_response_that_is_not_json_falls_back():
+    with StubServer({"/recognize": (200, b"<html>captcha</html>", 0)}) as stub:
+        google = GoogleBackend(sr.Recognizer(), url=stub.base_url + "/recognize")
+        fallback = FallbackBackend([google, StubBackend(["offline text"])])
+        assert fallback.recognize(_audio()) == "offline text"
+    assert fallback.breakers["google"].failures == 1
+
+def test_half_open_breaker_lets_a_single_trial_call_through():
+    flaky = FlakyBackend(None, delay=0.2)
+    fallback = FallbackBackend([flaky, StubBackend(["offline text"] * 10)], failure_threshold=1, reset_timeout=0.05)
+    fallback.breakers["flaky"].record_failure()
+    time.sleep(0.1)
+    assert fallback.breakers["flaky"].state == "half_open"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fallback.recognize(_audio()))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert flaky.calls == 1
+    assert sorted(results) == ["offline text"] * 4 + ["recovered"]
+    assert fallback.breakers["flaky"].state == "closed"
+
+def test_failed_trial_call_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
@@ -0,0 +1,118 @@
+import json
+import time
+
+import pytest
+
+from http_client import hedged
+from stub_server import StubServer
+
+def _slow(value, seconds):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+def _failing(message):
+    def call():
+        raise RuntimeError(message)
+    return call
+
+def test_hedged_returns_primary_when_it_answers_in_time():
+    fallback_calls = []
+    result = hedged(lambda: "primary", lambda: fallback_calls.append(1) or "fallback", hedge_after=1.0)
+    assert result == "primary"
+    assert fallback_calls == []
+
+def test_hedged_starts_fallback_when_primary_is_slow():
+    start = time.monotonic()
+    assert hedged(_slow("primary", 2.0), lambda: "fallback", hedge_after=0.05) == "fallback"
+    assert time.monotonic() - start < 1.0
+
+def test_hedged_starts_fallback_as_soon_as_primary_fails():
+    start = time.monotonic()
+    assert hedged(_failing("down"), lambda: "fallback", hedge_after=5.0) == "fallback"
+    assert time.monotonic() - start < 1.0
+
+def test_hedged_raises_fallback_error_when_both_fail():
+    with pytest.raises(RuntimeError, match="fallback down"):
+        hedged(_failing("primary down"), _failing("fallback down"), hedge_after=0.05)
+
+def test_synthesize_google_free_returns_audio(monkeypatch):
+    import tts_engines
+
+    with StubServer({"/translate_tts": (200, b"ID3-audio", 0)}) as stub:
+        monkeypatch.setattr(tts_engines, "GOOGLE_TTS_URL", stub.base_url + "/translate_tts")
+        assert tts_engines.synthesize_google_free("  Hello there  ") == b"ID3-audio"
+
+    (method, path, _), = stub.requests
+    assert method == "GET"
+    assert "q=Hello+there" in path
+
+def test_synthesize_google_free_returns_none_on_server_error(monkeypatch):
+    import tts_engines
+
+    with StubServer({"/translate_tts": (503, b"", 0)}) as stub:
+        monkeypatch.setattr(tts_engines, "GOOGLE_TTS_URL", stub.base_url + "/translate_tts")
+        assert tts_engines.synthesize_google_free("hello") is None
+    # 5xx responses are retried by the shared session
+    assert len(stub.requests) > 1
+
+def test_synthesize_google_free_does_not_retry_a_stalled_endpoint(monkeypatch):
+    import tts_engines
+
+    with StubServer({"/translate_tts": (200, b"late", 1.0)}) as stub:
+        monkeypatch.setattr(tts_engines, "GOOGLE_TTS_URL", stub.base_url + "/translate_tts")
+        monkeypatch.setattr(tts_engines, "default_timeout", lambda: (1.0, 0.2))
+        start = time.monotonic()
+        assert tts_engines.synthesize_google_free("hello") is None
+        assert time.monotonic() - start < 0.9
+    assert len(stub.requests) == 1
+
+def _audio():
+    sr = pytest.importorskip("speech_recognition")
+    return sr.AudioData(bytes(3200), 16000, 2)
+
+def _google_backend(url, timeout=5.0):
+    sr = pytest.importorskip("speech_recognition")
+    from asr_backends import GoogleBackend
+    return GoogleBackend(sr.Recognizer(), timeout=timeout, url=url)
+
+def test_google_backend_returns_most_confident_transcript():
+    response = "\n".join([
+        json.dumps({"result": []}),
+        json.dumps({"result": [{"alternative": [
+            {"transcript": "a pipe wench", "confidence": 0.4},
+            {"transcript": "a pipe wrench", "confidence": 0.9},
+        ]}]}),
+    ]).encode()
+
+    with StubServer({"/recognize": (200, response, 0)}) as stub:
+        backend = _google_backend(stub.base_url + "/recognize")
+        assert backend.recognize(_audio()) == "a pipe wrench"
+
+    (method, path, body), = stub.requests
+    assert method == "POST"
+    assert "lang=en-US" in path
+    assert body.startswith(b"fLaC")
+
+def test_google_backend_returns_none_when_nothing_was_recognized():
+    with StubServer({"/recognize": (200, json.dumps({"result": []}).encode(), 0)}) as stub:
+        assert _google_backend(stub.base_url + "/recognize").recognize(_audio()) is None
+
+def test_google_backend_raises_request_error_on_server_error():
+    sr = pytest.importorskip("speech_recognition")
+
+    with StubServer({"/recognize": (500, b"", 0)}) as stub:
+        with pytest.raises(sr.RequestError):
+            _google_backend(stub.base_url + "/recognize").recognize(_audio())
+
+def test_google_backend_gives_up_on_a_stalled_service():
+    sr = pytest.importorskip("speech_recognition")
+
+    with StubServer({"/recognize": (200, b"{}", 1.0)}) as stub:
+        backend = _google_backend(stub.base_url + "/recognize", timeout=0.2)
+        start = time.monotonic()
+        with pytest.raises(sr.RequestError):
+            backend.recognize(_audio())
+        assert time.monotonic() - start < 0.9
+    assert len(stub.requests) == 1
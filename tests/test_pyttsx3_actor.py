@@ -0,0 +1,81 @@
+import sys
+import threading
+import types
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+import tts_engines
+
+class FakeEngine:
+    """pyttsx3 engine double; the first one built hangs in runAndWait until released"""
+    built = []
+
+    def __init__(self):
+        self.hang = threading.Event() if not FakeEngine.built else None
+        self.pending = []
+        self.spoken = []
+        FakeEngine.built.append(self)
+
+    def setProperty(self, name, value):
+        pass
+
+    def getProperty(self, name):
+        return 150
+
+    def isBusy(self):
+        return False
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        self.pending.append(text)
+
+    def stop(self):
+        pass
+
+    def runAndWait(self):
+        if self.hang is not None:
+            self.hang.wait()
+        self.spoken.extend(self.pending)
+        self.pending = []
+
+@pytest.fixture
+def engines(monkeypatch):
+    FakeEngine.built = []
+    monkeypatch.setitem(sys.modules, "pyttsx3", types.SimpleNamespace(Engine=FakeEngine))
+    monkeypatch.setattr(tts_engines, "_pyttsx3_actor", None)
+    yield FakeEngine.built
+    for engine in FakeEngine.built:
+        if engine.hang is not None:
+            engine.hang.set()
+
+def test_hung_actor_is_replaced_and_its_queue_failed(engines):
+    hung = tts_engines.get_pyttsx3_actor()
+    stuck = hung.say("first question")
+    queued = hung.say("second question")
+    with pytest.raises(FutureTimeout):
+        stuck.result(timeout=0.2)
+
+    actor = tts_engines.replace_pyttsx3_actor(hung)
+
+    assert actor is not hung
+    assert tts_engines.get_pyttsx3_actor() is actor
+    assert queued.result(timeout=1) is False
+    assert hung.say("too late").result(timeout=1) is False
+    assert actor.say("third question").result(timeout=1) is True
+    assert engines[-1] is not engines[0]
+    assert engines[-1].spoken == ["third question"]
+
+def test_replacing_an_already_replaced_actor_keeps_the_new_one(engines):
+    hung = tts_engines.get_pyttsx3_actor()
+    actor = tts_engines.replace_pyttsx3_actor(hung)
+
+    assert tts_engines.replace_pyttsx3_actor(hung) is actor
+
+def test_timeout_grows_with_the_text(engines):
+    actor = tts_engines.Pyttsx3Actor(rate=150)
+
+    assert actor.timeout_for("") == 5
+    assert actor.timeout_for("word " * 150) == 5 + 120
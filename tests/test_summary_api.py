@@ -0,0 +1,185 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("google.generativeai")
+from fastapi.testclient import TestClient
+
+import main
+import summary_cache
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for the Gemini model; records prompts and answers with canned text"""
+    model_name = "fake-model"
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        if stream:
+            return iter([FakeResponse("A short "), FakeResponse("summary.")])
+        return FakeResponse("A short summary.")
+
+def make_pdf(text):
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdf.drawString(72, 720, text)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    fake = FakeModel()
+    monkeypatch.setattr(summary_cache, "_cache", summary_cache.SummaryCache(str(tmp_path / "summaries.db")))
+    monkeypatch.setattr(main, "limiter", main.AdmissionLimiter(concurrency=2, queue_size=0))
+    main.app.dependency_overrides[main.get_model] = lambda: fake
+    yield fake
+    main.app.dependency_overrides.clear()
+
+@pytest.fixture
+def client(model):
+    with TestClient(main.app) as client:
+        yield client
+
+def upload(client, content, path="/upload-and-summarize"):
+    return client.post(path, files={"file": ("document.pdf", content, "application/pdf")})
+
+def test_summarizes_an_uploaded_pdf(client, model):
+    response = upload(client, make_pdf("Copper pipes are joined by soldering."))
+
+    assert response.status_code == 200
+    assert response.json() == {"summary": "A short summary."}
+    assert len(model.prompts) == 1
+    assert "Copper pipes are joined by soldering." in model.prompts[0]
+
+def test_repeat_upload_is_served_from_the_cache(client, model):
+    pdf = make_pdf("Copper pipes are joined by soldering.")
+    upload(client, pdf)
+    response = upload(client, pdf)
+
+    assert response.json() == {"summary": "A short summary."}
+    assert len(model.prompts) == 1
+
+def test_rejects_uploads_with_429_when_the_queue_is_full(client, model):
+    main.limiter.admitted = main.limiter.capacity
+
+    response = upload(client, make_pdf("Copper pipes are joined by soldering."))
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert model.prompts == []
+
+def test_rejects_a_file_that_is_not_a_pdf_with_400(client, model):
+    response = upload(client, b"this is not a pdf")
+
+    assert response.status_code == 400
+    assert "Could not read PDF" in response.json()["detail"]
+    assert model.prompts == []
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_stream_sends_progress_tokens_and_the_summary(client, model):
+    response = upload(client, make_pdf("Copper pipes are joined by soldering."), "/upload-and-summarize/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert ("pages", {"parsed": 1, "total": 1}) in events
+    assert [data["text"] for event, data in events if event == "token"] == ["A short ", "summary."]
+    assert events[-1] == ("done", {"summary": "A short summary."})
+
+def test_stream_reports_a_bad_pdf_as_an_error_event(client, model):
+    response = upload(client, b"this is not a pdf", "/upload-and-summarize/stream")
+
+    event, data = _events(response.text)[-1]
+    assert event == "error"
+    assert data["status"] == 400
+
+def test_rejects_a_pdf_pypdf_cannot_decrypt_with_400(client, model, monkeypatch):
+    import pypdf
+    from pypdf.errors import DependencyError
+
+    def unreadable(stream):
+        raise DependencyError("cryptography>=3.1 is required for AES algorithm")
+    monkeypatch.setattr(pypdf, "PdfReader", unreadable)
+
+    response = upload(client, make_pdf("Copper pipes are joined by soldering."))
+
+    assert response.status_code == 400
+    assert "cryptography" in response.json()["detail"]
+
+def test_rejects_a_pdf_with_an_unparseable_page_with_400(client, model, monkeypatch):
+    from pypdf import PageObject
+
+    def broken(self, *args, **kwargs):
+        raise KeyError("/Contents")
+    monkeypatch.setattr(PageObject, "extract_text", broken)
+
+    response = upload(client, make_pdf("Copper pipes are joined by soldering."))
+
+    assert response.status_code == 400
+    assert "page 1" in response.json()["detail"]
+    assert model.prompts == []
+
+def test_joined_summary_survives_the_first_caller_disconnecting(model, monkeypatch):
+    import asyncio
+    from fastapi import UploadFile
+
+    monkeypatch.setattr(main, "limiter", main.AdmissionLimiter(concurrency=1, queue_size=2))
+    pdf = make_pdf("Copper pipes are joined by soldering.")
+
+    async def scenario():
+        first = UploadFile(io.BytesIO(pdf), filename="document.pdf")
+        second = UploadFile(io.BytesIO(pdf), filename="document.pdf")
+        async with main.limiter.slot():
+            # The only slot is taken, so the first upload's summary waits with both callers on it
+            leaving = asyncio.ensure_future(main.upload_and_summarize(first, model))
+            staying = asyncio.ensure_future(main.upload_and_summarize(second, model))
+            inflight = summary_cache.get_summary_cache()._inflight
+            while not inflight or next(iter(inflight.values())).waiters < 2:
+                await asyncio.sleep(0.01)
+            # The first client disconnects, and its request closes the upload on the way out
+            leaving.cancel()
+            await first.close()
+        return await staying
+
+    assert asyncio.run(scenario()) == {"summary": "A short summary."}
+    assert len(model.prompts) == 1
+
+def test_stream_reports_a_server_fault_reading_a_page_as_500(client, model, monkeypatch):
+    from pypdf import PageObject
+
+    def out_of_memory(self, *args, **kwargs):
+        raise MemoryError()
+    monkeypatch.setattr(PageObject, "extract_text", out_of_memory)
+
+    response = upload(client, make_pdf("Copper pipes are joined by soldering."), "/upload-and-summarize/stream")
+
+    event, data = _events(response.text)[-1]
+    assert event == "error"
+    assert data["status"] == 500
+
+def test_reading_a_closed_upload_is_not_blamed_on_the_pdf():
+    from pdf_ingest import iter_page_text, open_pdf
+
+    stream = io.BytesIO(make_pdf("Copper pipes are joined by soldering."))
+    reader = open_pdf(stream)
+    stream.close()
+
+    # PdfRejected would be a 400; the plain ValueError surfaces as a 500
+    with pytest.raises(ValueError, match="closed file"):
+        next(iter_page_text(reader))
@@ -0,0 +1,187 @@
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+DEFAULT_TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "interview_agent_tts"))
+DEFAULT_TTS_CACHE_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+class TTSCache:
+    """Content-addressed cache of synthesized audio, in memory and on disk.
+
+    Entries are keyed by a hash of (text, engine, voice, rate). Both tiers are LRU:
+    the memory tier is bounded by memory_bytes, the disk tier by max_bytes.
+    """
+    def __init__(self, directory: str = DEFAULT_TTS_CACHE_DIR, max_bytes: int = DEFAULT_TTS_CACHE_BYTES,
+                 memory_bytes: int = 32 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self._memory_size = 0
+        self._disk = collections.OrderedDict()
+        self._disk_size = 0
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".audio") and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+        # Oldest first, so eviction removes the least recently used files
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+
+    @staticmethod
+    def key(text: str, engine: str, voice: Optional[str] = None, rate: Optional[float] = None) -> str:
+        payload = json.dumps([text, engine, voice, rate], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.audio")
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._disk_size -= self._disk.pop(key, 0)
+            return None
+
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        # Write to a temp file first so readers never see partial audio
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"TTS cache write failed: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._remember(key, data)
+            self._disk_size -= self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._disk_size += len(data)
+            evicted = []
+            while self._disk_size > self.max_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.unlink(self._path(old_key))
+            except OSError:
+                pass
+
+    def get_or_render(self, text: str, engine: str, voice: Optional[str], rate: Optional[float],
+                      render: Callable[[str], Optional[bytes]]) -> Optional[bytes]:
+        """Return cached audio for text, rendering and storing it on a miss"""
+        key = self.key(text, engine, voice, rate)
+        data = self.get(key)
+        if data is None:
+            data = render(text)
+            if data:
+                self.put(key, data)
+        return data
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide TTS cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache()
+    return _cache
+
+def render_cached(text: str, engine: str) -> Optional[bytes]:
+    """Synthesize text with an engine from tts_engines, going through the shared cache"""
+    from http_client import latency_metrics
+    from tts_engines import ENGINE_VOICES, SYNTHESIZERS
+    voice, rate = ENGINE_VOICES[engine]
+
+    def render(chunk):
+        start = time.perf_counter()
+        audio = SYNTHESIZERS[engine](chunk)
+        latency_metrics.record(f"tts.{engine}", time.perf_counter() - start, ok=bool(audio))
+        return audio
+
+    return get_tts_cache().get_or_render(text, engine, voice, rate, render)
+
+def prewarm(engines, workers: int = 4) -> int:
+    """Render every question in the question bank ahead of time; returns the number rendered"""
+    from concurrent.futures import ThreadPoolExecutor
+    from question_bank import get_question_bank
+    from tts_engines import split_for_speech
+
+    # Speech is synthesized per chunk, so cache the same chunks playback will ask for
+    texts = [
+        chunk
+        for question in get_question_bank().all_questions()
+        for chunk in split_for_speech(question["text"])
+    ]
+    jobs = [(text, engine) for engine in engines for text in texts]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda job: render_cached(*job), jobs))
+    return sum(1 for audio in results if audio)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the synthesized question audio cache")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    prewarm_parser = subcommands.add_parser("prewarm", help="Render the whole question bank into the cache")
+    prewarm_parser.add_argument("--engines", default="google_free,piper")
+    prewarm_parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == "prewarm":
+        from tts_engines import piper_available
+        engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+        if "piper" in engines and not piper_available():
+            print("Piper voice files not found, skipping piper")
+            engines.remove("piper")
+        count = prewarm(engines, workers=args.workers)
+        print(f"Cached {count} clips in {get_tts_cache().directory}")
@@ -0,0 +1,391 @@
+import io
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from concurrent.futures import Future
+from typing import Optional, Tuple
+from http_client import GOOGLE_TTS_URL, default_timeout, get_http_session
+
+PIPER_VOICE = "en_US-amy-medium"
+PIPER_MODEL = f"{PIPER_VOICE}.onnx"
+PIPER_CONFIG = f"{PIPER_MODEL}.json"
+
+# Voice and rate per engine, used to key cached audio
+ENGINE_VOICES = {
+    "google_free": ("en", None),
+    "piper": (PIPER_VOICE, None),
+}
+
+# File format each engine produces
+ENGINE_FORMATS = {
+    "google_free": "mp3",
+    "piper": "wav",
+}
+
+# Google Translate TTS rejects longer requests
+MAX_CHUNK_CHARS = 200
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;:])\s+')
+CLAUSE_BOUNDARY = re.compile(r'(?<=,)\s+')
+
+def _pack(pieces, max_chars: int) -> list:
+    """Greedily join pieces with spaces into strings of at most max_chars"""
+    packed = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) <= max_chars:
+            current = f"{current} {piece}"
+        else:
+            if current:
+                packed.append(current)
+            current = piece
+    if current:
+        packed.append(current)
+    return packed
+
+def split_for_speech(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list:
+    """Split text into chunks of at most max_chars, one sentence per chunk where possible.
+
+    Long sentences are split at commas, then between words, so nothing is dropped.
+    """
+    chunks = []
+    for sentence in SENTENCE_BOUNDARY.split(" ".join(text.split())):
+        if len(sentence) <= max_chars:
+            if sentence:
+                chunks.append(sentence)
+            continue
+        for clause in _pack(CLAUSE_BOUNDARY.split(sentence), max_chars):
+            if len(clause) <= max_chars:
+                chunks.append(clause)
+                continue
+            words = []
+            for word in clause.split(" "):
+                words.extend(word[i:i + max_chars] for i in range(0, len(word), max_chars))
+            chunks.extend(_pack(words, max_chars))
+    return chunks
+
+def piper_available() -> bool:
+    """Check if Piper TTS files are available"""
+    return os.path.exists(PIPER_MODEL) and os.path.exists(PIPER_CONFIG)
+
+def synthesize_google_free(text: str) -> Optional[bytes]:
+    """Fetch MP3 audio from Google Translate's free TTS service for one chunk of at most MAX_CHUNK_CHARS"""
+    try:
+        # Clean and prepare text; callers split longer text with split_for_speech
+        text = text.strip()
+
+        # Google Translate TTS (free service), over the shared keep-alive session
+        params = {'ie': 'UTF-8', 'tl': 'en', 'client': 'tw-ob', 'q': text}
+        response = get_http_session().get(GOOGLE_TTS_URL, params=params, timeout=default_timeout())
+
+        if response.status_code == 200:
+            return response.content
+        print(f"Google TTS request failed: {response.status_code}")
+        return None
+
+    except Exception as e:
+        print(f"Google TTS Error: {e}")
+        return None
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, sample_width: int = 2, channels: int = 1) -> bytes:
+    """Wrap raw PCM in an in-memory WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+class PiperWorker:
+    """Long-lived Piper synthesizer that loads the voice model once.
+
+    With the piper-tts package installed the model runs in-process and audio comes
+    back as raw PCM in memory. Otherwise a single piper subprocess stays running and
+    is fed one utterance per line over stdin.
+    """
+    def __init__(self, model: str = PIPER_MODEL, config: str = PIPER_CONFIG):
+        self.model = model
+        self.config = config
+        self._lock = threading.Lock()
+        self._voice = None
+        self._process = None
+        self._output_dir = None
+
+        try:
+            from piper.voice import PiperVoice
+            self._voice = PiperVoice.load(model, config_path=config)
+        except ImportError:
+            self._start_process()
+
+    def _start_process(self) -> None:
+        self._output_dir = tempfile.mkdtemp(prefix="piper_")
+        self._process = subprocess.Popen(
+            ['piper', '--model', self.model, '--config', self.config, '--output_dir', self._output_dir],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+
+    def synthesize_pcm(self, text: str) -> Tuple[bytes, int]:
+        """Return (16-bit mono PCM, sample rate) for text"""
+        with self._lock:
+            if self._voice is not None:
+                return self._synthesize_in_process(text)
+            return self._synthesize_with_process(text)
+
+    def _synthesize_in_process(self, text: str) -> Tuple[bytes, int]:
+        voice = self._voice
+        if hasattr(voice, 'synthesize_stream_raw'):
+            pcm = b"".join(voice.synthesize_stream_raw(text))
+        else:
+            # piper-tts >= 1.3 yields AudioChunk objects
+            pcm = b"".join(chunk.audio_int16_bytes for chunk in voice.synthesize(text))
+        return pcm, voice.config.sample_rate
+
+    def _synthesize_with_process(self, text: str) -> Tuple[bytes, int]:
+        if self._process is None or self._process.poll() is not None:
+            self._start_process()
+
+        # Piper reads one utterance per line and prints the path of the WAV it wrote
+        self._process.stdin.write(" ".join(text.split()) + "\n")
+        self._process.stdin.flush()
+        wav_path = self._process.stdout.readline().strip()
+        if not wav_path:
+            raise RuntimeError("piper process exited")
+
+        try:
+            with wave.open(wav_path, 'rb') as wav_file:
+                return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+        finally:
+            os.unlink(wav_path)
+
+    def synthesize_wav(self, text: str) -> bytes:
+        pcm, sample_rate = self.synthesize_pcm(text)
+        return pcm_to_wav(pcm, sample_rate)
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+            self._process = None
+        if self._output_dir:
+            shutil.rmtree(self._output_dir, ignore_errors=True)
+            self._output_dir = None
+
+_piper_worker = None
+_piper_lock = threading.Lock()
+
+def get_piper_worker() -> PiperWorker:
+    """Process-wide Piper worker, loading the voice on first use"""
+    global _piper_worker
+    if _piper_worker is None:
+        with _piper_lock:
+            if _piper_worker is None:
+                _piper_worker = PiperWorker()
+    return _piper_worker
+
+def synthesize_piper(text: str) -> Optional[bytes]:
+    """Render WAV audio with the shared Piper worker"""
+    try:
+        return get_piper_worker().synthesize_wav(text)
+    except Exception as e:
+        print(f"Piper TTS Error: {e}")
+        return None
+
+def synthesize_piper_oneshot(text: str) -> Optional[bytes]:
+    """Render WAV audio by launching piper for a single utterance (the old path, kept for benchmarking)"""
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
+        temp_wav_path = temp_wav.name
+    try:
+        result = subprocess.run(
+            ['piper', '--model', PIPER_MODEL, '--config', PIPER_CONFIG, '--output_file', temp_wav_path],
+            input=text, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"Piper TTS failed: {result.stderr}")
+            return None
+        with open(temp_wav_path, 'rb') as f:
+            return f.read()
+    finally:
+        try:
+            os.unlink(temp_wav_path)
+        except OSError:
+            pass
+
+class Pyttsx3Actor:
+    """Dedicated thread that owns one pyttsx3 engine for the life of the process.
+
+    Utterances are queued and spoken in order. pyttsx3 engines must be driven from the
+    thread that created them, so all engine calls happen on the actor thread; the engine
+    is rebuilt only when a health check or an utterance fails. stop() cuts off the
+    utterance being spoken: the engine's word callbacks, which run on the actor thread,
+    call engine.stop() once they see it. An engine that hangs inside runAndWait never
+    returns to the actor, so callers wait at most timeout_for(text) and then swap the
+    actor out with replace_pyttsx3_actor().
+    """
+    def __init__(self, rate: int = 150, volume: float = 0.9):
+        self.rate = rate
+        self.volume = volume
+        self._queue = queue.Queue()
+        self._engine = None
+        # Bumped by stop(); utterances queued under an older epoch are dropped
+        self._epoch = 0
+        self._speaking_epoch = None
+        self._abandoned = False
+        self._thread = threading.Thread(target=self._run, name="pyttsx3-actor", daemon=True)
+        self._thread.start()
+
+    def say(self, text: str) -> Future:
+        """Queue text; the future resolves to True once spoken, False if speech failed or was stopped"""
+        future = Future()
+        if self._abandoned:
+            future.set_result(False)
+            return future
+        self._queue.put((text, future, self._epoch))
+        return future
+
+    def timeout_for(self, text: str) -> float:
+        """Generous bound on how long speaking text should take at the configured rate"""
+        return 5 + 2 * len(text.split()) * 60 / self.rate
+
+    def stop(self) -> None:
+        """Cut off the current utterance and drop any queued before this call"""
+        self._epoch += 1
+
+    def reset(self) -> None:
+        """Ask the actor to rebuild its engine before the next utterance"""
+        self._queue.put((None, None, None))
+
+    def close(self) -> None:
+        self._queue.put((None, False, None))
+
+    def abandon(self) -> None:
+        """Give up on a hung actor: fail everything queued, and exit the thread if it ever returns"""
+        self._abandoned = True
+        self._epoch += 1
+        while True:
+            try:
+                _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future and future.set_running_or_notify_cancel():
+                future.set_result(False)
+        self.close()
+
+    def _create_engine(self):
+        try:
+            import pyttsx3
+            # Not pyttsx3.init(): it hands back the live engine for the driver, which after
+            # replace_pyttsx3_actor() is the one still hung on the abandoned actor
+            engine = pyttsx3.Engine()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            engine.connect('started-utterance', self._check_stopped)
+            engine.connect('started-word', self._check_stopped)
+            return engine
+        except Exception as e:
+            print(f"Failed to initialize pyttsx3: {e}")
+            return None
+
+    def _check_stopped(self, **_) -> None:
+        # Called by the engine on the actor thread while runAndWait is speaking
+        if self._speaking_epoch != self._epoch and self._engine is not None:
+            self._engine.stop()
+
+    def _healthy(self) -> bool:
+        if self._engine is None:
+            return False
+        try:
+            self._engine.getProperty('rate')
+            return not self._engine.isBusy()
+        except Exception:
+            return False
+
+    def _run(self) -> None:
+        self._engine = self._create_engine()
+        while True:
+            text, future, epoch = self._queue.get()
+            if text is None:
+                if future is False:
+                    break
+                self._engine = self._create_engine()
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            if epoch != self._epoch:
+                future.set_result(False)
+                continue
+
+            if not self._healthy():
+                self._engine = self._create_engine()
+            if self._engine is None:
+                print("TTS engine not available")
+                future.set_result(False)
+                continue
+
+            self._speaking_epoch = epoch
+            try:
+                self._engine.say(text)
+                self._engine.runAndWait()
+                future.set_result(epoch == self._epoch)
+            except Exception as e:
+                print(f"pyttsx3 TTS Error: {e}")
+                # Rebuild lazily before the next utterance
+                self._engine = None
+                future.set_result(False)
+            finally:
+                self._speaking_epoch = None
+
+_pyttsx3_actor = None
+_pyttsx3_lock = threading.Lock()
+
+def get_pyttsx3_actor() -> Pyttsx3Actor:
+    """Process-wide pyttsx3 actor"""
+    global _pyttsx3_actor
+    if _pyttsx3_actor is None:
+        with _pyttsx3_lock:
+            if _pyttsx3_actor is None:
+                _pyttsx3_actor = Pyttsx3Actor()
+    return _pyttsx3_actor
+
+def replace_pyttsx3_actor(hung: Pyttsx3Actor) -> Pyttsx3Actor:
+    """Abandon a hung actor and return its replacement (or the one another caller already made)"""
+    global _pyttsx3_actor
+    with _pyttsx3_lock:
+        if _pyttsx3_actor is hung or _pyttsx3_actor is None:
+            _pyttsx3_actor = Pyttsx3Actor(hung.rate, hung.volume)
+        actor = _pyttsx3_actor
+    hung.abandon()
+    return actor
+
+SYNTHESIZERS = {
+    "google_free": synthesize_google_free,
+    "piper": synthesize_piper,
+}
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Compare one-shot and persistent Piper synthesis")
+    parser.add_argument("text", nargs="?", default="What are the signs of a failing water heater?")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, synthesize in (("one-shot", synthesize_piper_oneshot), ("worker", synthesize_piper)):
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            synthesize(args.text)
+            timings.append(time.perf_counter() - start)
+        print(f"{label:>8}: first {timings[0] * 1000:.0f} ms, "
+              f"mean {sum(timings) / len(timings) * 1000:.0f} ms, "
+              f"{len(timings) / sum(timings):.2f} utterances/s")